@@ -6,6 +6,7 @@ from .core import (
     caches,
     create_cache_key,
     create_tag_cache_key,
+    create_lock_cache_key,
     invalidate_cache_key,
     invalidate_cache_prefix,
     invalidate_cache_tags,
@@ -1,2 +1,4 @@
+from .circuit_breaker import CircuitBreakerBackend
 from .locmem_cache import LocMemCacheBackend
-from .redis_cache import RedisCacheBackend
+from .redis_cache import RedisCacheBackend, RedisPoolCacheBackend
+from .tiered import TieredCacheBackend
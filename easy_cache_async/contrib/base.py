@@ -1,8 +1,17 @@
 import json
 from abc import ABC, abstractmethod
+from collections import Counter
+from time import perf_counter
 
-from ..core import DEFAULT_TIMEOUT, NOT_FOUND, create_cache_key
-from ..utils import force_binary, force_text
+from ..core import DEFAULT_TIMEOUT, NOT_FOUND, ImproperlyConfigured, TaggedValue, TagVersionsCache, create_cache_key
+from .serializers import (
+    TAGGED_VALUE_HEADER,
+    dump_tagged_value,
+    get_compressor,
+    get_serializer,
+    load_tagged_value,
+    load_value,
+)
 
 
 class BaseCacheBackend(ABC):
@@ -11,8 +20,18 @@ class BaseCacheBackend(ABC):
         self.prefix = options.get('prefix')
         self.make_key = options.get('make_key', self.default_make_key)
         self.timeout = options.get('timeout')
+        # timeout of tags keys written by TaggedCacheProxy, the same as values one if None
+        self.tags_timeout = options.get('tags_timeout')
         self.options = options
 
+        # tags versions may be cached in process memory for a short time
+        tag_versions_ttl = options.get('tag_versions_ttl')
+        self.tag_versions = None
+        if tag_versions_ttl:
+            self.tag_versions = TagVersionsCache(
+                tag_versions_ttl, options.get('tag_versions_maxsize', 1024)
+            )
+
     def default_make_key(self, key):
         if not self.prefix:
             return key
@@ -35,9 +54,10 @@ class BaseCacheBackend(ABC):
         pass
 
     @abstractmethod
-    async def get_many(self, keys):
+    async def get_many(self, keys, default=None):
         """
             :type keys: list | tuple
+            :param default: value of keys not found in cache
             :rtype dict:
         """
         pass
@@ -50,9 +70,10 @@ class BaseCacheBackend(ABC):
         pass
 
     @abstractmethod
-    async def set_many(self, data_dict, timeout=DEFAULT_TIMEOUT):
+    async def set_many(self, data_dict, timeout=DEFAULT_TIMEOUT, timeouts=None):
         """
             :type data_dict: dict
+            :param timeouts: dict, key -> timeout, overrides `timeout` for particular keys
         """
         pass
 
@@ -65,19 +86,82 @@ class BaseCacheBackend(ABC):
 
 
 class SerializerMixin:
-    """Interface to support data serialization"""
+    """Interface to support data serialization and compression"""
 
     def __init__(self, **options):
-        self.serializer = options.pop('serializer', json)
+        # `json` module (or any object with `dumps` and `loads`) or BaseSerializer instance
+        self.serializer = get_serializer(options.pop('serializer', json))
+        # BaseCompressor instance, data is compressed if it's not shorter than threshold (in bytes)
+        self.compressor = options.pop('compressor', None)
+        self.compress_threshold = options.pop('compress_threshold', 1024)
+        # tagged values are written in binary envelope, enable it when
+        # all the readers are able to parse it
+        self.tagged_values = options.pop('tagged_values', False)
+        if not self.serializer.detect_headers and (self.compressor is not None or self.tagged_values):
+            raise ImproperlyConfigured(
+                'Compression and tagged_values require serializer detecting headers, e.g. BaseSerializer subclass'
+            )
+        # compression counters, time is measured in seconds
+        self.stats = Counter()
         # noinspection PyArgumentList
         super().__init__(**options)
 
+    @property
+    def compression_ratio(self):
+        """ Size of compressed data relative to the original one """
+        if not self.stats['compress_bytes_in']:
+            return None
+        return self.stats['compress_bytes_out'] / self.stats['compress_bytes_in']
+
     def load_value(self, value):
         if value is None:
             return value
-
-        value = force_text(value)
-        return self.serializer.loads(value)
-
-    def dump_value(self, value):
-        return force_binary(self.serializer.dumps(value))
+        if not self.serializer.detect_headers:
+            # data of binary legacy serializers may start with any byte
+            return self.serializer.load_value(value)
+
+        tags = None
+        if value[:1] == TAGGED_VALUE_HEADER:
+            tags, offset = load_tagged_value(value)
+            value = memoryview(value)[offset:]
+
+        compressor = get_compressor(bytes(value[:1]))
+        if compressor is not None:
+            started = perf_counter()
+            value = compressor.decompress(memoryview(value)[1:])
+            self.stats['decompressed'] += 1
+            self.stats['decompress_time'] += perf_counter() - started
+
+        value = load_value(value, self.serializer)
+        return value if tags is None else TaggedValue(tags, value)
+
+    def dump_value(self, value, serializer=None):
+        """ :param serializer: overrides backend serializer, e.g. for particular function """
+        if isinstance(value, TaggedValue):
+            # only the value is compressed, so tags may be read by redis script
+            return dump_tagged_value(value.tags, self.dump_value(value.value, serializer))
+
+        if serializer is None:
+            data = self.serializer.dump_value(value)
+        elif not self.serializer.detect_headers:
+            # data written by other serializers can't be told apart from the backend one
+            raise ImproperlyConfigured('Function serializer requires backend serializer detecting headers')
+        else:
+            data = get_serializer(serializer).dump_value(value)
+
+        if self.compressor is None or len(data) < self.compress_threshold:
+            return data
+
+        started = perf_counter()
+        compressed = self.compressor.header + self.compressor.compress(data)
+        self.stats['compress_time'] += perf_counter() - started
+
+        if len(compressed) >= len(data):
+            # incompressible data
+            self.stats['compress_skipped'] += 1
+            return data
+
+        self.stats['compressed'] += 1
+        self.stats['compress_bytes_in'] += len(data)
+        self.stats['compress_bytes_out'] += len(compressed)
+        return compressed
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from collections import Counter, deque
+from time import monotonic
+
+from .base import BaseCacheBackend
+from ..core import BYPASS_LOCK_TOKEN, DEFAULT_TIMEOUT, NOT_FOUND
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreakerBackend(BaseCacheBackend):
+    """Wraps any cache backend and stops using it while it's failing.
+
+    Failed (raised an exception or slower than `slow_call_duration`) calls
+    are tracked in a sliding window of the last `window_size` calls. Circuit
+    is opened when at least `min_calls` calls are made and failure rate
+    reaches `failure_rate_threshold`: cache is bypassed for `reset_timeout`
+    seconds, i.e. reads are misses and writes are dropped, so decorated
+    functions are called directly. Then up to `half_open_calls` probe calls
+    are passed to the backend, the circuit is closed if they succeed
+    or opened again otherwise.
+
+    Failures of the wrapped backend are never raised, the same fallback
+    values are returned instead.
+    """
+
+    errors = (Exception, )
+
+    def __init__(self, backend, **options):
+        """
+        :type backend: BaseCacheBackend
+        """
+        # other attributes (e.g. `tag_versions`, `prefix`) are taken from wrapped backend
+        self.backend = backend
+        self.failure_rate_threshold = options.get('failure_rate_threshold', 0.5)
+        self.min_calls = options.get('min_calls', 10)
+        self.window_size = options.get('window_size', 50)
+        self.reset_timeout = options.get('reset_timeout', 10)
+        self.slow_call_duration = options.get('slow_call_duration')
+        self.half_open_calls = options.get('half_open_calls', 1)
+
+        # counters: "failures", "slow_calls", "short_circuited", "opened"
+        self.stats = Counter()
+        self.state = CLOSED
+        self._opened_at = None
+        self._probes = 0
+        # True for failed calls
+        self._window = deque(maxlen=self.window_size)
+
+    def __getattr__(self, item):
+        if item == 'backend':
+            raise AttributeError(item)
+        return getattr(self.backend, item)
+
+    @property
+    def failure_rate(self):
+        if not self._window:
+            return 0.0
+        return sum(self._window) / len(self._window)
+
+    def reset(self):
+        """ Closes the circuit and forgets all the tracked calls """
+        self.state = CLOSED
+        self._opened_at = None
+        self._probes = 0
+        self._window.clear()
+
+    def _open(self):
+        logger.warning('Circuit is opened for %r, failure rate %.2f', self.backend, self.failure_rate)
+        self.stats['opened'] += 1
+        self.state = OPEN
+        self._opened_at = monotonic()
+        self._probes = 0
+
+    def _allow_call(self):
+        if self.state == OPEN:
+            if monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                return False
+            self._probes += 1
+
+        return True
+
+    def _record(self, state, failed):
+        if state != self.state:
+            # result of the call made before the state was changed
+            return
+
+        if state == HALF_OPEN:
+            if failed:
+                self._open()
+            else:
+                logger.info('Circuit is closed for %r', self.backend)
+                self.reset()
+            return
+
+        self._window.append(failed)
+        if len(self._window) >= self.min_calls and self.failure_rate >= self.failure_rate_threshold:
+            self._open()
+
+    async def _call(self, method, fallback, *args, **kwargs):
+        if not self._allow_call():
+            self.stats['short_circuited'] += 1
+            return fallback
+
+        state = self.state
+        started = monotonic()
+        try:
+            result = await getattr(self.backend, method)(*args, **kwargs)
+        except asyncio.CancelledError:
+            # cancelled caller isn't a backend failure
+            raise
+        except self.errors as ex:
+            self.stats['failures'] += 1
+            logger.warning('Cache backend %s call failed: %r', method, ex)
+            self._record(state, True)
+            return fallback
+
+        slow = self.slow_call_duration is not None and monotonic() - started > self.slow_call_duration
+        if slow:
+            self.stats['slow_calls'] += 1
+        self._record(state, slow)
+        return result
+
+    async def get(self, key, default=NOT_FOUND):
+        return await self._call('get', default, key, default)
+
+    async def get_many(self, keys, default=None):
+        keys = list(keys)
+        return await self._call('get_many', dict.fromkeys(keys, default), keys, default)
+
+    async def get_tagged(self, key, default=NOT_FOUND):
+        if not hasattr(self.backend, 'get_tagged'):
+            return await self.get(key, default), False
+        return await self._call('get_tagged', (default, False), key, default)
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, **kwargs):
+        return await self._call('set', None, key, value, timeout, **kwargs)
+
+    async def set_many(self, data_dict, timeout=DEFAULT_TIMEOUT, **kwargs):
+        return await self._call('set_many', None, data_dict, timeout, **kwargs)
+
+    async def set_tag_versions(self, data_dict, timeout=DEFAULT_TIMEOUT):
+        method = 'set_tag_versions' if hasattr(self.backend, 'set_tag_versions') else 'set_many'
+        return await self._call(method, None, data_dict, timeout)
+
+    async def delete(self, key):
+        return await self._call('delete', False, key)
+
+    async def acquire_lock(self, key, timeout):
+        """ Lock is considered as acquired if the backend doesn't support locks or it's not used """
+        if not hasattr(self.backend, 'acquire_lock'):
+            return BYPASS_LOCK_TOKEN
+        return await self._call('acquire_lock', BYPASS_LOCK_TOKEN, key, timeout)
+
+    async def release_lock(self, key, token):
+        if token == BYPASS_LOCK_TOKEN or not hasattr(self.backend, 'release_lock'):
+            return False
+        return await self._call('release_lock', False, key, token)
+
+    def __repr__(self):
+        return '<{} {} for {!r}>'.format(self.__class__.__name__, self.state, self.backend)
@@ -8,14 +8,14 @@ class DummyCacheInstance(BaseCacheBackend):
     async def delete(self, key):
         pass
 
-    async def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, serializer=None):
         pass
 
     async def get(self, key, default=NOT_FOUND):
         return default
 
-    async def set_many(self, data_dict, timeout=DEFAULT_TIMEOUT):
+    async def set_many(self, data_dict, timeout=DEFAULT_TIMEOUT, serializer=None, timeouts=None):
         pass
 
-    async def get_many(self, keys):
+    async def get_many(self, keys, default=None):
         return {}
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import Counter, defaultdict
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = 'easy-cache-async:invalidation'
+
+
+class BaseTransport:
+    """Delivers invalidation messages to all the subscribed processes"""
+
+    async def publish(self, channel, message: bytes):
+        raise NotImplementedError
+
+    async def subscribe(self, channel, callback):
+        """ :param callback: function called with every received message """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class LocalTransport(BaseTransport):
+    """In-process transport, every bus using the same transport instance
+    acts as a separate process, e.g. in tests.
+    """
+
+    def __init__(self):
+        # channel -> callbacks
+        self._callbacks = defaultdict(list)
+
+    async def publish(self, channel, message):
+        loop = asyncio.get_event_loop()
+        for callback in self._callbacks[channel]:
+            loop.call_soon(callback, message)
+
+    async def subscribe(self, channel, callback):
+        self._callbacks[channel].append(callback)
+
+    async def close(self):
+        self._callbacks.clear()
+
+
+class RedisTransport(BaseTransport):
+    """Redis pub/sub transport.
+
+    Subscribed connection can't execute other commands,
+    so separate `subscriber` connection is required to receive messages.
+    """
+
+    def __init__(self, publisher, subscriber=None):
+        """
+        :type publisher: aioredis.Redis
+        :type subscriber: aioredis.Redis
+        """
+        self.publisher = publisher
+        self.subscriber = subscriber
+        self._readers = []
+
+    async def publish(self, channel, message):
+        await self.publisher.publish(channel, message)
+
+    async def subscribe(self, channel, callback):
+        if self.subscriber is None:
+            raise ValueError('Subscriber connection is required to receive messages')
+
+        redis_channel, = await self.subscriber.subscribe(channel)
+        self._readers.append(asyncio.ensure_future(self._read(redis_channel, callback)))
+
+    @staticmethod
+    async def _read(redis_channel, callback):
+        while await redis_channel.wait_message():
+            callback(await redis_channel.get())
+
+    async def close(self):
+        for reader in self._readers:
+            reader.cancel()
+        self._readers = []
+
+
+class InvalidationBus:
+    """Broadcasts keys changed by one process to the others, so near caches
+    (e.g. `LocMemCacheBackend` created with `invalidation_bus` option)
+    evict them and read the actual values from remote cache.
+
+    Published keys are collected for `debounce_ms` milliseconds (or until
+    `max_batch_size` keys are collected) and sent with a single message,
+    so near caches are stale for `debounce_ms` plus transport latency at most.
+    Messages published by the bus itself are ignored.
+    """
+
+    def __init__(self, transport, channel=DEFAULT_CHANNEL, debounce_ms=10, max_batch_size=1000):
+        """
+        :type transport: BaseTransport
+        """
+        self.transport = transport
+        self.channel = channel
+        self.debounce_ms = debounce_ms
+        self.max_batch_size = max_batch_size
+        self.id = uuid.uuid4().hex
+
+        # counters: "published" and "received" keys, "sent" and "delivered" messages
+        self.stats = Counter()
+        self._subscribers = []
+        self._pending = set()
+        self._flush_handle = None
+        # tasks sending flushed keys
+        self._sending = set()
+
+    def subscribe(self, callback):
+        """ :param callback: function called with list of keys invalidated by other processes """
+        self._subscribers.append(callback)
+
+    async def start(self):
+        """ Starts receiving messages """
+        await self.transport.subscribe(self.channel, self._on_message)
+
+    def publish(self, keys):
+        self._pending.update(keys)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None and self._pending:
+            self._flush_handle = asyncio.get_event_loop().call_later(self.debounce_ms / 1000, self._flush)
+
+    def _take_pending(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        keys, self._pending = self._pending, set()
+        return keys
+
+    def _flush(self):
+        keys = self._take_pending()
+        if keys:
+            task = asyncio.ensure_future(self._send(keys))
+            self._sending.add(task)
+            task.add_done_callback(self._on_sent)
+
+    def _on_sent(self, task):
+        self._sending.discard(task)
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('Invalidation message sending failed', exc_info=task.exception())
+
+    async def flush(self):
+        """ Sends pending keys right away """
+        keys = self._take_pending()
+        if keys:
+            await self._send(keys)
+
+    async def _send(self, keys):
+        message = json.dumps({'origin': self.id, 'keys': sorted(keys)}).encode()
+        try:
+            await self.transport.publish(self.channel, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            # other processes will notice changes when their near caches expire
+            logger.warning('Invalidation message is not sent: %r', ex)
+            return
+
+        self.stats['published'] += len(keys)
+        self.stats['sent'] += 1
+
+    def _on_message(self, message):
+        try:
+            data = json.loads(message if isinstance(message, str) else message.decode())
+        except ValueError:
+            logger.warning('Invalid invalidation message: %r', message)
+            return
+
+        if data.get('origin') == self.id:
+            return
+
+        keys = data.get('keys') or []
+        self.stats['received'] += len(keys)
+        self.stats['delivered'] += 1
+
+        for callback in self._subscribers:
+            callback(keys)
+
+    async def close(self):
+        await self.flush()
+        if self._sending:
+            # messages scheduled before closing are sent
+            await asyncio.gather(*self._sending, return_exceptions=True)
+        await self.transport.close()
@@ -1,55 +1,106 @@
-from asyncio import Lock
-from collections import namedtuple
+from time import monotonic
 
 from .base import BaseCacheBackend
-from ..core import DEFAULT_TIMEOUT, NOT_FOUND, get_timestamp
+from .memory_store import MemoryStore
+from ..core import DEFAULT_TIMEOUT, NOT_FOUND
 
 
-class CachedValue(namedtuple('CachedValue', ['value', 'timeout', 'timestamp'])):
+class CachedValue:
+    """ Value with absolute expiration time by `time.monotonic` clock,
+        deadline is None for values without timeout
+    """
+    __slots__ = ('value', 'timeout', 'deadline')
+
+    def __init__(self, value, timeout, deadline):
+        self.value = value
+        self.timeout = timeout
+        self.deadline = deadline
 
     @property
     def is_valid(self):
-        if not self.timeout:
-            return True
+        return self.deadline is None or self.deadline >= monotonic()
 
-        if self.timeout is DEFAULT_TIMEOUT:
-            return True
 
-        return (self.timeout * 1000000 + self.timestamp) >= get_timestamp()
+def get_deadline(timeout, now):
+    if not timeout or timeout is DEFAULT_TIMEOUT:
+        return None
+    return now + timeout
 
 
 class LocMemCacheBackend(BaseCacheBackend):
     """Memory cache backend compatible with easy_cache_async
 
-    Instance of cachetools.Cache (and derivatives) must be passed to init.
-    See: https://pypi.python.org/pypi/cachetools
+    Instance of cachetools.Cache (and derivatives) or `memory_store.MemoryStore`
+    must be passed to init. See: https://pypi.python.org/pypi/cachetools
+    If client isn't provided, `MemoryStore` is created with `maxsize`, `max_bytes`,
+    `size_estimator` and `policy` options, so memory usage may be bounded by size
+    in bytes and scan resistant eviction policy may be used.
+
+    Values are kept as is, so `serializer` parameter is ignored.
+    Event loop is single threaded and cache is never awaited
+    during the update, so no locks are used.
     """
 
-    def __init__(self, client, **options):
+    tagged_values = True
+
+    def __init__(self, client=None, **options):
         """
-        :type client: cachetools.Cache
+        :type client: cachetools.Cache | easy_cache_async.contrib.memory_store.MemoryStore
         """
+        if client is None:
+            client = MemoryStore(
+                maxsize=options.get('maxsize'),
+                max_bytes=options.get('max_bytes'),
+                size_estimator=options.get('size_estimator', 'deep'),
+                policy=options.get('policy'),
+            )
+        elif 'max_bytes' in options or 'policy' in options:
+            raise ValueError('max_bytes and policy options are supported by MemoryStore created by backend only')
+
         self.client = client
-        self.lock = Lock()
         super().__init__(**options)
 
+        # keys changed by other processes are evicted, see contrib.invalidation
+        self.invalidation_bus = options.get('invalidation_bus')
+        if self.invalidation_bus is not None:
+            self.invalidation_bus.subscribe(self.evict)
+
+    @property
+    def used_bytes(self):
+        """ :returns: estimated size of cached values in bytes, None if it's not tracked """
+        if getattr(self.client, 'max_bytes', None) is None:
+            return None
+        return self.client.used_bytes
+
     async def get(self, key, default=NOT_FOUND):
         return self.s_get(key, default)
 
     def s_get(self, key, default=NOT_FOUND):
-        value = self.client.get(self.make_key(key), NOT_FOUND)  # type: CachedValue
+        key = self.make_key(key)
+        value = self.client.get(key, NOT_FOUND)  # type: CachedValue
 
         if value is NOT_FOUND:
             return default
 
-        return value.value if value.is_valid else default
+        deadline = value.deadline
+        if deadline is not None and deadline < monotonic():
+            # expired values are removed lazily
+            self.client.pop(key, None)
+            return default
 
-    async def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        return value.value
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, serializer=None):
         timeout = self.make_timeout(timeout)
+        self.client[self.make_key(key)] = CachedValue(value, timeout, get_deadline(timeout, monotonic()))
+
+    def evict(self, keys):
+        """ Removes keys from local cache, e.g. changed by other processes """
+        for key in keys:
+            self.client.pop(self.make_key(key), None)
 
-        # this is not thread safe lock
-        async with self.lock:
-            self.client[self.make_key(key)] = CachedValue(value, timeout, get_timestamp())
+        if self.tag_versions is not None:
+            self.tag_versions.set_many(dict.fromkeys(keys))
 
     async def delete(self, key):
         try:
@@ -59,16 +110,19 @@ class LocMemCacheBackend(BaseCacheBackend):
             # fail silently if key is not found in cache
             return False
 
-    async def get_many(self, keys):
-        return {key: self.s_get(key, default=None) for key in keys}
+    async def get_many(self, keys, default=None):
+        return {key: self.s_get(key, default=default) for key in keys}
 
-    async def set_many(self, data_dict: dict, timeout=DEFAULT_TIMEOUT):
-        timestamp = get_timestamp()
+    async def set_many(self, data_dict: dict, timeout=DEFAULT_TIMEOUT, serializer=None, timeouts=None):
+        now = monotonic()
         timeout = self.make_timeout(timeout)
-
-        # this is not thread safe lock
-        async with self.lock:
-            self.client.update({
-                self.make_key(key): CachedValue(value, timeout, timestamp)
-                for key, value in data_dict.items()
-            })
+        deadline = get_deadline(timeout, now)
+        client = self.client
+        make_key = self.make_key
+
+        for key, value in data_dict.items():
+            if timeouts and key in timeouts:
+                key_timeout = self.make_timeout(timeouts[key])
+                client[make_key(key)] = CachedValue(value, key_timeout, get_deadline(key_timeout, now))
+            else:
+                client[make_key(key)] = CachedValue(value, timeout, deadline)
@@ -0,0 +1,289 @@
+import asyncio
+import heapq
+import pickle
+import sys
+from collections import Counter, OrderedDict
+from collections.abc import Mapping, MutableMapping
+from time import monotonic
+from types import FunctionType
+
+from .policies import get_policy
+from ..core import NOT_SET
+
+
+def serialized_size(value):
+    """ Size of pickled value, fast for large strings and bytes, underestimates objects overhead """
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def deep_getsizeof(value):
+    """ `sys.getsizeof` of value and all the objects referenced by it,
+        shared objects are counted once
+    """
+    size = 0
+    seen = set()
+    stack = [value]
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        # classes and functions are shared, they aren't part of value
+        if isinstance(obj, (str, bytes, bytearray, int, float, type, FunctionType)):
+            continue
+        if isinstance(obj, Mapping):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+
+        if hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+        for cls in type(obj).__mro__:
+            slots = cls.__dict__.get('__slots__', ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                if slot != '__dict__' and hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+
+    return size
+
+
+SIZE_ESTIMATORS = {
+    'serialized': serialized_size,
+    'deep': deep_getsizeof,
+}
+
+
+def get_size_estimator(estimator):
+    """ :param estimator: name from `SIZE_ESTIMATORS` or function returning size of value in bytes """
+    if callable(estimator):
+        return estimator
+    try:
+        return SIZE_ESTIMATORS[estimator]
+    except KeyError:
+        raise ValueError('Unknown size estimator: {!r}'.format(estimator))
+
+
+class MemoryStore(MutableMapping):
+    """In-memory storage for `LocMemCacheBackend`, drop-in replacement of
+    `cachetools.Cache` with least recently used eviction and expiry index.
+
+    Values with `deadline` attribute (`time.monotonic` timestamp, see
+    `locmem_cache.CachedValue`) are indexed in buckets of `resolution` seconds,
+    so expired values are removed incrementally by `expire` calls, e.g. from
+    background task (see `start`), instead of waiting for eviction by size.
+    All the operations except `expire` are O(1).
+
+    Memory usage is bounded by `max_bytes` budget if provided: size of every
+    value is estimated on write with `size_estimator` and least recently used
+    entries are evicted until the total size (`used_bytes`) fits the budget.
+
+    Least recently used entries are evicted by default, scan resistant
+    `policy` ("tinylfu" or "arc", see `contrib.policies`) keeps frequently
+    used entries when many keys are read once, e.g. by batch jobs.
+    """
+
+    def __init__(self, maxsize=None, resolution=1.0, expire_batch_size=1000, max_bytes=None, size_estimator='deep',
+                 policy=None):
+        """
+        :param maxsize: max number of entries, least recently used ones are evicted first
+        :param resolution: width of expiry buckets in seconds
+        :param expire_batch_size: max number of entries removed by single `expire` call
+        :param max_bytes: max total size of values in bytes
+        :param size_estimator: "deep", "serialized" or function returning size of value in bytes
+        :param policy: "lru" (default), "tinylfu", "arc" or `policies.BasePolicy` instance
+        """
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self.expire_batch_size = expire_batch_size
+        self.max_bytes = max_bytes
+        self.size_estimator = get_size_estimator(size_estimator)
+        # order of `_data` is used for LRU eviction without policy
+        self.policy = None if policy in (None, 'lru') else get_policy(policy, maxsize)
+
+        # counters: "expired", "evicted" and "too_large" entries
+        self.stats = Counter()
+        self._data = OrderedDict()
+        # sizes of values are tracked with `max_bytes` only
+        self._sizes = {}
+        self.used_bytes = 0
+        # bucket number -> keys expiring in it, heap of bucket numbers
+        self._buckets = {}
+        self._buckets_heap = []
+        self._task = None
+
+    def _get_bucket(self, value):
+        deadline = getattr(value, 'deadline', None)
+        if deadline is None:
+            return None
+        return int(deadline // self.resolution)
+
+    def _index(self, key, bucket):
+        keys = self._buckets.get(bucket)
+        if keys is None:
+            keys = self._buckets[bucket] = set()
+            heapq.heappush(self._buckets_heap, bucket)
+        keys.add(key)
+
+    def _forget(self, key, value):
+        """ Removes key of deleted value from expiry index and sizes """
+        # empty buckets are removed by `expire`
+        bucket = self._get_bucket(value)
+        if bucket is not None:
+            self._buckets[bucket].discard(key)
+        if self._sizes:
+            self.used_bytes -= self._sizes.pop(key, 0)
+        if self.policy is not None:
+            self.policy.remove(key)
+
+    def _access(self, key):
+        if self.policy is None:
+            self._data.move_to_end(key)
+        else:
+            self.policy.access(key)
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        self._access(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._data.get(key, NOT_SET)
+        if value is NOT_SET:
+            return default
+        self._access(key)
+        return value
+
+    def __setitem__(self, key, value):
+        data = self._data
+        old_value = data.get(key, NOT_SET)
+
+        if self.max_bytes is not None:
+            size = self.size_estimator(value)
+            if size > self.max_bytes:
+                # value isn't saved, the previous one is outdated
+                if old_value is not NOT_SET:
+                    del self[key]
+                self.stats['too_large'] += 1
+                return
+
+            self.used_bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+
+        bucket = self._get_bucket(value)
+        data[key] = value
+
+        if old_value is NOT_SET:
+            if self.policy is not None:
+                self.policy.insert(key)
+        else:
+            self._access(key)
+            old_bucket = self._get_bucket(old_value)
+            if old_bucket == bucket:
+                # index isn't changed
+                bucket = None
+            elif old_bucket is not None:
+                self._buckets[old_bucket].discard(key)
+
+        if bucket is not None:
+            self._index(key, bucket)
+
+        if self.maxsize is not None:
+            while len(data) > self.maxsize:
+                self.popitem()
+        if self.max_bytes is not None:
+            while self.used_bytes > self.max_bytes:
+                self.popitem()
+
+    def __delitem__(self, key):
+        self._forget(key, self._data.pop(key))
+
+    def pop(self, key, default=NOT_SET):
+        value = self._data.pop(key, NOT_SET)
+        if value is NOT_SET:
+            if default is NOT_SET:
+                raise KeyError(key)
+            return default
+
+        self._forget(key, value)
+        return value
+
+    def popitem(self):
+        """ Removes entry chosen by policy, least recently used one by default """
+        if self.policy is None:
+            key, value = self._data.popitem(last=False)
+        else:
+            key = self.policy.evict()
+            value = self._data.pop(key)
+        self._forget(key, value)
+        self.stats['evicted'] += 1
+        return key, value
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+        self._buckets.clear()
+        self._buckets_heap = []
+        self._sizes.clear()
+        self.used_bytes = 0
+        if self.policy is not None:
+            self.policy.clear()
+
+    def expire(self, now=None):
+        """ Removes values from buckets passed completely
+            :returns: number of removed values, `expire_batch_size` at most
+        """
+        current = int((monotonic() if now is None else now) // self.resolution)
+        buckets = self._buckets
+        heap = self._buckets_heap
+        sizes = self._sizes
+        policy = self.policy
+        removed = 0
+
+        while heap and heap[0] < current and removed < self.expire_batch_size:
+            keys = buckets[heap[0]]
+
+            while keys and removed < self.expire_batch_size:
+                key = keys.pop()
+                del self._data[key]
+                if sizes:
+                    self.used_bytes -= sizes.pop(key, 0)
+                if policy is not None:
+                    policy.remove(key)
+                removed += 1
+
+            if not keys:
+                del buckets[heapq.heappop(heap)]
+
+        self.stats['expired'] += removed
+        return removed
+
+    async def _expire_periodically(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+
+            # event loop isn't blocked for long time if there are many expired values
+            while self.expire() == self.expire_batch_size:
+                await asyncio.sleep(0)
+
+    def start(self, interval=None):
+        """ Starts background task removing expired values every `interval` (`resolution` by default) seconds """
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._expire_periodically(interval or self.resolution))
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,272 @@
+from collections import OrderedDict
+
+
+class BasePolicy:
+    """Eviction policy of `memory_store.MemoryStore`.
+
+    Store notifies policy about inserted, read and removed keys,
+    `evict` is called when store is full and must return a key to remove.
+    """
+
+    def __init__(self, capacity=None):
+        """ :param capacity: max number of entries, `maxsize` of the store """
+        self.capacity = capacity
+
+    def insert(self, key):
+        raise NotImplementedError
+
+    def access(self, key):
+        raise NotImplementedError
+
+    def remove(self, key):
+        raise NotImplementedError
+
+    def evict(self):
+        """ Chooses victim and forgets it, :returns: key to remove from store """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+def _pop_oldest(keys):
+    return keys.popitem(last=False)[0]
+
+
+class CountMinSketch:
+    """Approximate frequency of keys in fixed memory, counters are 4-bit like
+    (15 at most) and halved every `sample_size` increments, so frequency
+    reflects recent history.
+    """
+
+    def __init__(self, width, sample_size=None):
+        # width is a power of 2, so index is taken with bit mask
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self.mask = self.width - 1
+        self.sample_size = sample_size or 10 * self.width
+        # 4 rows of counters in a single array
+        self.table = bytearray(4 * self.width)
+        self.additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        mask = self.mask
+        width = self.width
+        return (
+            (h * 0x9E3779B1 >> 16) & mask,
+            width + ((h * 0x85EBCA77 >> 16) & mask),
+            2 * width + ((h * 0xC2B2AE3D >> 16) & mask),
+            3 * width + ((h * 0x27D4EB2F >> 16) & mask),
+        )
+
+    def increment(self, key):
+        table = self.table
+        for index in self._indexes(key):
+            if table[index] < 15:
+                table[index] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.reset()
+
+    def frequency(self, key):
+        return min(map(self.table.__getitem__, self._indexes(key)))
+
+    def reset(self):
+        """ Ages all the counters """
+        self.table = bytearray(counter >> 1 for counter in self.table)
+        self.additions //= 2
+
+    def clear(self):
+        self.table = bytearray(4 * self.width)
+        self.additions = 0
+
+
+class TinyLFUPolicy(BasePolicy):
+    """W-TinyLFU: new keys get into small LRU window (`window_ratio` of capacity),
+    keys evicted from the window are admitted to main segmented LRU only if
+    they are accessed more frequently than main segment victim. Frequencies
+    are estimated with count-min sketch, so one-off keys (e.g. batch jobs
+    iterating over many keys) don't flush frequently used ones.
+
+    Main segment consists of probation part and protected one
+    (`protected_ratio` of main), keys are promoted to protected part on hit.
+    """
+
+    def __init__(self, capacity, window_ratio=0.01, protected_ratio=0.8):
+        if not capacity:
+            raise ValueError('TinyLFU policy requires capacity (store maxsize)')
+        super().__init__(capacity)
+
+        self.window_capacity = max(1, int(capacity * window_ratio))
+        self.main_capacity = capacity - self.window_capacity
+        self.protected_capacity = int(self.main_capacity * protected_ratio)
+        self.sketch = CountMinSketch(capacity)
+
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+
+    def insert(self, key):
+        self.sketch.increment(key)
+        window = self._window
+        window[key] = None
+
+        # window overflows only when main segment is full, see `evict`
+        if len(window) > self.window_capacity and len(self._probation) + len(self._protected) < self.main_capacity:
+            self._probation[_pop_oldest(window)] = None
+
+    def access(self, key):
+        self.sketch.increment(key)
+
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            protected = self._protected
+            protected[key] = None
+            if len(protected) > self.protected_capacity:
+                self._probation[_pop_oldest(protected)] = None
+        else:
+            self._protected.move_to_end(key)
+
+    def remove(self, key):
+        for keys in (self._window, self._probation, self._protected):
+            if key in keys:
+                del keys[key]
+                return
+
+    def _main_victim(self):
+        return next(iter(self._probation or self._protected), None)
+
+    def evict(self):
+        window = self._window
+        victim = self._main_victim()
+
+        if victim is None or len(window) > self.window_capacity:
+            candidate = _pop_oldest(window)
+            if victim is None:
+                return candidate
+
+            # admission: the less frequent of candidate and main victim is evicted
+            if self.sketch.frequency(candidate) <= self.sketch.frequency(victim):
+                return candidate
+            self.remove(victim)
+            self._probation[candidate] = None
+            return victim
+
+        self.remove(victim)
+        return victim
+
+    def clear(self):
+        self._window.clear()
+        self._probation.clear()
+        self._protected.clear()
+        self.sketch.clear()
+
+
+class ARCPolicy(BasePolicy):
+    """Adaptive replacement cache: balances recently used keys (seen once, T1)
+    and frequently used ones (seen at least twice, T2). Ghost lists of
+    recently evicted keys (B1, B2) adapt T1 target size `p`: hits in B1
+    make it larger, hits in B2 make it smaller. Keys seen once are never
+    promoted to T2, so scans evict each other, not the frequent keys.
+
+    Store calls `evict` after the new key is inserted, while ARC replaces
+    an entry before admitting it, so the new key isn't counted in T1 size
+    and is never chosen as victim (unless it's the only key).
+    """
+
+    def __init__(self, capacity):
+        if not capacity:
+            raise ValueError('ARC policy requires capacity (store maxsize)')
+        super().__init__(capacity)
+
+        self.p = 0
+        self._t1 = OrderedDict()
+        self._t2 = OrderedDict()
+        self._b1 = OrderedDict()
+        self._b2 = OrderedDict()
+        # the last inserted key and whether it was found in B2
+        self._admitted = None
+        self._admitted_from_b2 = False
+
+    def insert(self, key):
+        b1, b2 = self._b1, self._b2
+        self._admitted = key
+        self._admitted_from_b2 = key in b2
+
+        if key in b1:
+            self.p = min(self.capacity, self.p + max(len(b2) / len(b1), 1))
+            del b1[key]
+            self._t2[key] = None
+        elif key in b2:
+            self.p = max(0, self.p - max(len(b1) / len(b2), 1))
+            del b2[key]
+            self._t2[key] = None
+        else:
+            self._t1[key] = None
+
+    def access(self, key):
+        if key in self._t1:
+            del self._t1[key]
+            self._t2[key] = None
+        else:
+            self._t2.move_to_end(key)
+
+    def remove(self, key):
+        if key == self._admitted:
+            self._admitted = None
+        # removed key isn't evicted by policy, so it doesn't get into ghost lists
+        if key in self._t1:
+            del self._t1[key]
+        else:
+            self._t2.pop(key, None)
+
+    def evict(self):
+        t1 = self._t1
+        t1_size = len(t1) - (self._admitted in t1)
+
+        # admitted key is the most recent one in T1, so it's the oldest only if it's alone there
+        if not self._t2 or t1_size and (
+            t1_size > self.p or (t1_size == self.p and self._admitted_from_b2)
+        ):
+            key = _pop_oldest(t1)
+            self._b1[key] = None
+        else:
+            key = _pop_oldest(self._t2)
+            self._b2[key] = None
+
+        if key == self._admitted:
+            self._admitted = None
+
+        # T1 and B1 keep `capacity` keys at most, all the lists - twice as many
+        b1, b2 = self._b1, self._b2
+        while b1 and len(self._t1) + len(b1) > self.capacity:
+            _pop_oldest(b1)
+        while b2 and len(self._t1) + len(self._t2) + len(b1) + len(b2) > 2 * self.capacity:
+            _pop_oldest(b2)
+        return key
+
+    def clear(self):
+        for keys in (self._t1, self._t2, self._b1, self._b2):
+            keys.clear()
+        self.p = 0
+        self._admitted = None
+
+
+POLICIES = {
+    'tinylfu': TinyLFUPolicy,
+    'arc': ARCPolicy,
+}
+
+
+def get_policy(policy, capacity):
+    """ :param policy: name from `POLICIES` or `BasePolicy` instance """
+    if isinstance(policy, BasePolicy):
+        return policy
+    try:
+        policy_class = POLICIES[policy]
+    except KeyError:
+        raise ValueError('Unknown eviction policy: {!r}'.format(policy))
+    return policy_class(capacity)
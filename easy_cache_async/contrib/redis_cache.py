@@ -1,5 +1,115 @@
+import asyncio
+import logging
+import uuid
+from functools import partial
+
 from .base import BaseCacheBackend, SerializerMixin
-from ..core import DEFAULT_TIMEOUT, NOT_FOUND
+from ..core import BYPASS_LOCK_TOKEN, DEFAULT_TIMEOUT, NOT_FOUND
+
+try:
+    from aioredis import RedisError
+except ImportError:
+    RedisError = OSError
+
+
+logger = logging.getLogger(__name__)
+
+
+# delete lock key only if it is still owned by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# get value and compare its tags versions with the current ones,
+# binary envelope of TaggedValue (see contrib.serializers) starts with 0xA0 byte,
+# otherwise value is expected to be JSON with tags in the beginning, e.g.
+# {"tags": {"tag:a": 1, ...}, "value": ...}, it's parsed without cjson,
+# returns nil if key is not found or any tag version differs,
+# {value, 1 if tags are valid else 0 if they can't be validated by script}
+GET_TAGGED_SCRIPT = """
+local data = redis.call('GET', KEYS[1])
+if not data then
+    return false
+end
+
+-- 1 if tag has the same version, 0 if it differs (or tag is missing),
+-- nil if version isn't a number, e.g. tag is saved with binary serializer
+local function compare(tag, version)
+    local current = redis.call('GET', ARGV[1] .. tag)
+    if current == version then
+        return 1
+    end
+    if current and not string.find(current, '^%d+$') then
+        return nil
+    end
+    return 0
+end
+
+local validated = 1
+
+if string.byte(data, 1) == 160 then
+    local tags_count = string.byte(data, 2) * 256 + string.byte(data, 3)
+    if tags_count == 0 then
+        return {data, 0}
+    end
+
+    -- pairs of tag key length and version go first, then tags keys
+    local pos = 4
+    local key_pos = pos + tags_count * 10
+    for _ = 1, tags_count do
+        local length = string.byte(data, pos) * 256 + string.byte(data, pos + 1)
+        local tag = string.sub(data, key_pos, key_pos + length - 1)
+        key_pos = key_pos + length
+
+        -- int64 version, timestamps in microseconds fit into double precision
+        local version = 0
+        for i = pos + 2, pos + 9 do
+            version = version * 256 + string.byte(data, i)
+        end
+        pos = pos + 10
+
+        local result = compare(tag, string.format('%.0f', version))
+        if result == 0 then
+            return false
+        elseif not result then
+            validated = 0
+        end
+    end
+    return {data, validated}
+end
+
+local _, finish = string.find(data, '^{%s*"tags"%s*:%s*{%s*')
+if not finish then
+    return {data, 0}
+end
+
+local pos = finish + 1
+local tags_count = 0
+while true do
+    local tag, version
+    _, finish, tag, version = string.find(data, '^"([^"\\\\]*)"%s*:%s*(%d+)%s*,?%s*', pos)
+    if not finish then
+        break
+    end
+
+    local result = compare(tag, version)
+    if result == 0 then
+        return false
+    elseif not result then
+        validated = 0
+    end
+    tags_count = tags_count + 1
+    pos = finish + 1
+end
+
+if tags_count == 0 or string.sub(data, pos, pos) ~= '}' then
+    return {data, 0}
+end
+return {data, validated}
+"""
 
 
 class RedisCacheBackend(SerializerMixin, BaseCacheBackend):
@@ -15,43 +125,59 @@ class RedisCacheBackend(SerializerMixin, BaseCacheBackend):
         self.client = client
         super().__init__(**options)
 
-    async def get_many(self, keys) -> dict:
-        return dict(
-            zip(
-                keys,
-                map(self.load_value, await self.client.mget(*self.make_keys(keys)))
-            )
+        # server side tags validation knows nothing about custom keys
+        # and headers of data written by binary legacy serializers
+        self.tagged_reads = (
+            options.get('tagged_reads', True) and 'make_key' not in options and self.serializer.detect_headers
         )
+        # script -> sha1 digest
+        self._scripts = {}
+
+    async def get_many(self, keys, default=None) -> dict:
+        return {
+            key: default if data is None else self.load_value(data)
+            for key, data in zip(keys, await self.client.mget(*self.make_keys(keys)))
+        }
 
-    async def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, serializer=None):
         """
         :param timeout: must be in seconds
+        :param serializer: overrides backend serializer
         """
         timeout = self.make_timeout(timeout)
 
         return await self.client.set(
             self.make_key(key),
-            self.dump_value(value),
+            self.dump_value(value, serializer),
             expire=timeout
         )
 
-    async def set_many(self, data_dict: dict, timeout=DEFAULT_TIMEOUT):
+    async def set_many(self, data_dict: dict, timeout=DEFAULT_TIMEOUT, serializer=None, timeouts=None):
         """
+        Keys with timeout are saved with `SET PX` commands, so they never exist
+        without expiration, other keys are saved with single `MSET` command.
+
         :param timeout: must be in seconds
+        :param serializer: overrides backend serializer
+        :param timeouts: dict, key -> timeout, overrides `timeout` for particular keys
         """
         timeout = self.make_timeout(timeout)
+        timeouts = timeouts or {}
 
+        pipe = self.client.pipeline()
         pairs = []
         for key, value in data_dict.items():
-            pairs.append(self.make_key(key))
-            pairs.append(self.dump_value(value))
+            key_timeout = self.make_timeout(timeouts[key]) if key in timeouts else timeout
+            data = self.dump_value(value, serializer)
 
-        pipe = self.client.pipeline()
-        pipe.mset(*pairs)
+            if key_timeout:
+                pipe.set(self.make_key(key), data, pexpire=int(key_timeout * 1000))
+            else:
+                pairs.append(self.make_key(key))
+                pairs.append(data)
 
-        if timeout:
-            for key in data_dict:
-                pipe.expire(self.make_key(key), timeout)
+        if pairs:
+            pipe.mset(*pairs)
 
         return await pipe.execute()
 
@@ -62,9 +188,192 @@ class RedisCacheBackend(SerializerMixin, BaseCacheBackend):
         result = await self.client.get(self.make_key(key))
         return default if result is None else self.load_value(result)
 
+    async def eval_script(self, script, keys=(), args=()):
+        """
+        Executes lua script with EVALSHA, script is loaded once
+        and reloaded if it's missed in redis script cache.
+        """
+        sha = self._scripts.get(script)
+        if sha is not None:
+            try:
+                return await self.client.evalsha(sha, keys=list(keys), args=list(args))
+            except Exception as ex:
+                if not str(ex).startswith('NOSCRIPT'):
+                    raise
+
+        sha = self._scripts[script] = await self.client.script_load(script)
+        return await self.client.evalsha(sha, keys=list(keys), args=list(args))
+
+    async def get_tagged(self, key, default=NOT_FOUND):
+        """
+        Gets tagged value and validates its tags in a single request.
+        Tag keys are read inside of lua script, so it's not compatible with redis cluster.
+        Value with outdated tags is treated as not found. Tags can't be validated by
+        script if the backend serializer is binary (e.g. `PickleSerializer`): values
+        without envelope and tags versions aren't readable by script then, so such
+        values are always validated by the caller with one more request.
+
+        :returns: tuple (value, validated), tags must be checked by the caller
+        if value is not validated
+        """
+        if not self.tagged_reads:
+            return await self.get(key, default), False
+
+        result = await self.eval_script(
+            GET_TAGGED_SCRIPT, keys=[self.make_key(key)], args=[self.make_key('')]
+        )
+        if result is None:
+            return default, False
+
+        data, validated = result
+        return self.load_value(data), bool(validated)
+
+    async def acquire_lock(self, key, timeout):
+        """
+        Acquires lock with SET NX PX command.
+
+        :param timeout: lock expiration time in seconds
+        :returns: token required to release the lock or `None` if lock is held by someone else
+        """
+        token = uuid.uuid4().hex
+        acquired = await self.client.set(
+            self.make_key(key),
+            token,
+            pexpire=int(timeout * 1000),
+            exist=self.client.SET_IF_NOT_EXIST,
+        )
+        return token if acquired else None
+
+    async def release_lock(self, key, token):
+        """
+        Releases lock acquired with `acquire_lock`, expired or
+        re-acquired by someone else lock is left untouched.
+        """
+        return bool(
+            await self.client.eval(RELEASE_LOCK_SCRIPT, keys=[self.make_key(key)], args=[token])
+        )
+
     async def close(self):
         """
         Close redis connection
         """
         self.client.quit()
         return await self.client.wait_closed()
+
+
+class RedisPoolCacheBackend(RedisCacheBackend):
+    """Redis cache backend for pool of connections, e.g. created with
+    `aioredis.create_redis_pool`, see `from_address`.
+
+    Every command has a deadline and number of commands executed
+    concurrently is bounded, so slow or unavailable redis doesn't stall
+    the callers: failed reads are treated as cache misses
+    and failed writes are dropped. Invalidations (`delete` and
+    `set_tag_versions`) are retried once and their failures are raised.
+    """
+    # exceptions treated as cache failures along with timeouts
+    errors = (OSError, EOFError, RedisError)
+
+    def __init__(self, client, **options):
+        """
+        :type client: aioredis.Redis
+        """
+        super().__init__(client, **options)
+
+        # deadline of every command (including waiting for a free slot) in seconds
+        self.operation_timeout = options.get('operation_timeout', 0.5)
+        self.max_in_flight = options.get('max_in_flight') or getattr(client.connection, 'maxsize', 10)
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    @classmethod
+    async def from_address(cls, address, max_connections=10, **options):
+        """ Creates backend with new pool of `max_connections` connections """
+        import aioredis
+
+        client = await aioredis.create_redis_pool(address, maxsize=max_connections)
+        return cls(client, max_in_flight=options.pop('max_in_flight', max_connections), **options)
+
+    @property
+    def pool_stats(self):
+        """ Pool saturation metrics, failures counters are kept in `stats` """
+        pool = self.client.connection
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'pool_size': getattr(pool, 'size', None),
+            'pool_free': getattr(pool, 'freesize', None),
+            'pool_maxsize': getattr(pool, 'maxsize', None),
+        }
+
+    async def _execute(self, func):
+        if self._semaphore.locked():
+            self.stats['saturated'] += 1
+
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                return await func()
+            finally:
+                self.in_flight -= 1
+
+    async def _guarded(self, func, fallback, operation):
+        """ Executes command with deadline, `fallback` is returned on failure """
+        try:
+            return await asyncio.wait_for(self._execute(func), self.operation_timeout)
+        except asyncio.TimeoutError:
+            self.stats[operation + '_timeouts'] += 1
+            logger.warning('Redis %s timed out', operation)
+        except self.errors as ex:
+            self.stats[operation + '_errors'] += 1
+            logger.warning('Redis %s failed: %r', operation, ex)
+        return fallback
+
+    async def _invalidate(self, func):
+        """ Executes invalidating command, it's retried once and then the failure is raised:
+            lost invalidation makes stale values served until they expire
+        """
+        for attempt in (1, 2):
+            try:
+                return await asyncio.wait_for(self._execute(func), self.operation_timeout)
+            except (asyncio.TimeoutError,) + self.errors as ex:
+                if attempt == 2:
+                    self.stats['invalidate_errors'] += 1
+                    logger.error('Redis invalidation failed: %r', ex)
+                    raise
+                logger.warning('Redis invalidation failed, retrying: %r', ex)
+
+    async def get(self, key, default=NOT_FOUND):
+        return await self._guarded(partial(super().get, key, default), default, 'read')
+
+    async def get_many(self, keys, default=None) -> dict:
+        keys = list(keys)
+        return await self._guarded(partial(super().get_many, keys, default), dict.fromkeys(keys, default), 'read')
+
+    async def eval_script(self, script, keys=(), args=()):
+        # used for reads only, e.g. `get_tagged`, failed script returns nothing
+        return await self._guarded(partial(super().eval_script, script, keys, args), None, 'read')
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, serializer=None):
+        return await self._guarded(partial(super().set, key, value, timeout, serializer), None, 'write')
+
+    async def set_many(self, data_dict: dict, timeout=DEFAULT_TIMEOUT, serializer=None, timeouts=None):
+        return await self._guarded(
+            partial(super().set_many, data_dict, timeout, serializer, timeouts), None, 'write'
+        )
+
+    async def set_tag_versions(self, data_dict, timeout=DEFAULT_TIMEOUT):
+        """ Saves versions of invalidated tags, see `TaggedCacheProxy.invalidate` """
+        return await self._invalidate(partial(super().set_many, data_dict, timeout))
+
+    async def delete(self, key):
+        return await self._invalidate(partial(super().delete, key))
+
+    async def acquire_lock(self, key, timeout):
+        """ Lock is considered as acquired if redis fails, so callers don't wait for it """
+        return await self._guarded(partial(super().acquire_lock, key, timeout), BYPASS_LOCK_TOKEN, 'write')
+
+    async def release_lock(self, key, token):
+        if token == BYPASS_LOCK_TOKEN:
+            return False
+        return await self._guarded(partial(super().release_lock, key, token), False, 'write')
@@ -0,0 +1,314 @@
+import json
+import lzma
+import marshal
+import pickle
+import struct
+import sys
+import zlib
+from io import BytesIO
+
+from ..core import ImproperlyConfigured
+from ..utils import force_binary, force_text
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# json.loads accepts bytes since python 3.6
+JSON_ACCEPTS_BYTES = sys.version_info >= (3, 6)
+
+# envelope of TaggedValue, header byte is the format version:
+# header, tags count (uint16), pairs of tag key length (uint16) and version (int64),
+# utf-8 tag keys, then serialized (and probably compressed) value, numbers are big-endian
+TAGGED_VALUE_HEADER = b'\xa0'
+_tags_count_struct = struct.Struct('>H')
+# tags count -> struct of tags keys lengths and versions
+_tags_structs = {}
+
+
+class BaseSerializer:
+    """Converts values to bytes and back.
+
+    Serialized data starts with `header` byte, so the data written with
+    different serializers may be read by any of them, e.g. during migration.
+    Header bytes are >= 0x81: JSON always starts with ASCII character and
+    0x80 is the first byte of pickled data.
+    """
+
+    header = None
+    # data written by other serializers (and compressed data) is detected by
+    # header byte, so own data must never start with header bytes (0x80 - 0xbf)
+    detect_headers = True
+    # `loads` accepts any bytes-like object, e.g. memoryview,
+    # so data is passed to it without copying
+    bytes_native = True
+
+    def dumps(self, value) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data):
+        raise NotImplementedError
+
+    def dump_value(self, value) -> bytes:
+        data = self.dumps(value)
+        if self.header is None:
+            return data
+        return self.header + data
+
+    def load_value(self, data):
+        if self.header is None:
+            return self.loads(data)
+        if self.bytes_native:
+            # slicing of memoryview doesn't copy data
+            return self.loads(memoryview(data)[1:])
+        return self.loads(bytes(data[1:]))
+
+
+class LegacySerializer(BaseSerializer):
+    """Wraps module (or object) with `dumps` and `loads` functions, e.g. `json`.
+    Data is written without header and it's decoded to text before loading
+    unless `bytes_native` is set.
+
+    Binary formats (e.g. `msgpack` module) may write any first byte, so headers
+    aren't detected and all the data is loaded with the module itself. Set
+    `detect_headers` if the data is always ASCII (or UTF-8) text.
+    """
+
+    def __init__(self, module, bytes_native=False, detect_headers=False):
+        self.module = module
+        self.bytes_native = bytes_native
+        self.detect_headers = detect_headers
+
+    def dumps(self, value):
+        return force_binary(self.module.dumps(value))
+
+    def loads(self, data):
+        if self.bytes_native:
+            return self.module.loads(data)
+        return self.module.loads(force_text(bytes(data)))
+
+
+class JsonSerializer(LegacySerializer):
+    """Default serializer, compatible with data written by previous versions"""
+
+    def __init__(self):
+        super().__init__(json, bytes_native=True, detect_headers=True)
+
+    def dumps(self, value):
+        return json.dumps(value).encode()
+
+    def loads(self, data):
+        if JSON_ACCEPTS_BYTES and not isinstance(data, memoryview):
+            return json.loads(data)
+        # memoryview (e.g. value of tagged envelope) isn't accepted by json,
+        # it's decoded to text in one step instead of copying to bytes first
+        return json.loads(str(data, 'utf-8'))
+
+
+class PickleSerializer(BaseSerializer):
+    """Supports any picklable python objects"""
+
+    header = b'\x81'
+
+    def __init__(self, protocol=None):
+        if protocol is None:
+            protocol = min(5, pickle.HIGHEST_PROTOCOL)
+        self.protocol = protocol
+
+    def dumps(self, value):
+        return pickle.dumps(value, protocol=self.protocol)
+
+    def dump_value(self, value):
+        # pickle writes data right after the header, without extra copying
+        buffer = BytesIO()
+        buffer.write(self.header)
+        pickle.Pickler(buffer, protocol=self.protocol).dump(value)
+        return buffer.getvalue()
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+class MsgpackSerializer(BaseSerializer):
+    """Compact binary format, `msgpack` package is required.
+    See: https://pypi.org/project/msgpack/
+    """
+
+    header = b'\x82'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImproperlyConfigured('msgpack package is required for MsgpackSerializer')
+
+    def dumps(self, value):
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class MarshalSerializer(BaseSerializer):
+    """The fastest one, but only primitive python types are supported:
+    numbers, strings, bytes, lists, tuples, sets, dicts, None and booleans.
+    """
+
+    header = b'\x83'
+
+    def dumps(self, value):
+        return marshal.dumps(value)
+
+    def loads(self, data):
+        return marshal.loads(data)
+
+
+class BaseCompressor:
+    """Compresses serialized data, compressed data starts with `header` byte.
+    Compressors headers are in range 0x90 - 0x9f.
+    """
+
+    header = None
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class ZlibCompressor(BaseCompressor):
+
+    header = b'\x90'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class LzmaCompressor(BaseCompressor):
+    """Better compression ratio than zlib, but much slower"""
+
+    header = b'\x91'
+
+    def __init__(self, preset=None):
+        self.preset = preset
+
+    def compress(self, data):
+        return lzma.compress(data, preset=self.preset)
+
+    def decompress(self, data):
+        return lzma.decompress(data)
+
+
+COMPRESSOR_CLASSES = {
+    ZlibCompressor.header: ZlibCompressor,
+    LzmaCompressor.header: LzmaCompressor,
+}
+
+SERIALIZER_CLASSES = {
+    PickleSerializer.header: PickleSerializer,
+    MsgpackSerializer.header: MsgpackSerializer,
+    MarshalSerializer.header: MarshalSerializer,
+}
+
+# header -> serializer instance used to read data
+_readers = {}
+
+
+def get_serializer(serializer):
+    """ :returns: BaseSerializer, legacy serializers (e.g. `json` module) are wrapped """
+    if serializer is None or serializer is json:
+        return JsonSerializer()
+    if isinstance(serializer, BaseSerializer):
+        return serializer
+    return LegacySerializer(serializer)
+
+
+def get_compressor(header):
+    """ :returns: BaseCompressor instance able to decompress data with provided header or None """
+    compressor_class = COMPRESSOR_CLASSES.get(header)
+    if compressor_class is None:
+        return None
+
+    reader = _readers.get(header)
+    if reader is None:
+        reader = _readers[header] = compressor_class()
+    return reader
+
+
+def load_value(data, default_serializer):
+    """ Data is loaded with the serializer it was written with
+        :type data: bytes
+        :type default_serializer: BaseSerializer
+    """
+    if not default_serializer.detect_headers:
+        return default_serializer.load_value(data)
+
+    header = bytes(data[:1])
+    serializer_class = SERIALIZER_CLASSES.get(header)
+
+    # data without header
+    if serializer_class is None:
+        if default_serializer.header is not None:
+            # headerless data is written by JSON serializer of previous versions
+            default_serializer = _readers.setdefault(None, JsonSerializer())
+        return default_serializer.load_value(data)
+
+    if isinstance(default_serializer, serializer_class):
+        return default_serializer.load_value(data)
+
+    reader = _readers.get(header)
+    if reader is None:
+        reader = _readers[header] = serializer_class()
+    return reader.load_value(data)
+
+
+def _get_tags_struct(count):
+    tags_struct = _tags_structs.get(count)
+    if tags_struct is None:
+        tags_struct = _tags_structs[count] = struct.Struct('>' + 'Hq' * count)
+    return tags_struct
+
+
+def dump_tagged_value(tags, data):
+    """ Writes tags envelope before serialized value
+        :param tags: dict, tag key -> version
+        :type data: bytes
+    """
+    keys = [force_binary(tag) for tag in tags]
+    versions = []
+    for key, version in zip(keys, tags.values()):
+        versions.append(len(key))
+        versions.append(version)
+
+    return b''.join((
+        TAGGED_VALUE_HEADER,
+        _tags_count_struct.pack(len(keys)),
+        _get_tags_struct(len(keys)).pack(*versions),
+        b''.join(keys),
+        data,
+    ))
+
+
+def load_tagged_value(data):
+    """ Reads tags envelope, data must start with `TAGGED_VALUE_HEADER`
+        :returns: tuple (tags dict, offset of serialized value)
+    """
+    count, = _tags_count_struct.unpack_from(data, 1)
+    tags_struct = _get_tags_struct(count)
+    versions = tags_struct.unpack_from(data, 3)
+    offset = 3 + tags_struct.size
+
+    tags = {}
+    for i in range(0, len(versions), 2):
+        length = versions[i]
+        tags[str(data[offset:offset + length], 'utf-8')] = versions[i + 1]
+        offset += length
+
+    return tags, offset
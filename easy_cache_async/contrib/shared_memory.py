@@ -0,0 +1,329 @@
+import fcntl
+import mmap
+import os
+import struct
+import uuid
+import zlib
+from contextlib import contextmanager
+from time import time
+
+from .base import BaseCacheBackend, SerializerMixin
+from ..core import DEFAULT_TIMEOUT, NOT_FOUND
+
+
+MAGIC = b'ECSM'
+VERSION = 1
+# magic, version, buckets, ways, slot size, lock stripes
+HEADER = struct.Struct('<4sHIIII')
+HEADER_SIZE = 64
+# sequence (odd while slot is written), time of write, deadline (0 - no expiration),
+# key length (0 - empty slot), value length
+SLOT_HEADER = struct.Struct('<QddHI')
+SEQUENCE = struct.Struct('<Q')
+
+# offset of lock taken while file is created, lock stripes follow it
+INIT_LOCK_OFFSET = 0
+
+
+class SharedMemoryTable:
+    """Hash table in memory mapped file shared by processes of a host,
+    e.g. workers of a web server. Use file in tmpfs (e.g. /dev/shm)
+    to keep it in memory only.
+
+    Table has `buckets` of `ways` fixed size slots, key and value must fit
+    a single slot. Key is placed in any slot of its bucket: the same key,
+    an empty or expired slot, or the least recently written one is replaced.
+
+    Readers take no locks: every slot is protected by sequence lock,
+    read is retried if the slot is changed while being read. Writers
+    of the same bucket are serialized with `fcntl` lock of one of
+    `lock_stripes` stripes. Memory of the table is allocated once,
+    so data never takes more than `buckets * ways * slot_size` bytes.
+    """
+
+    def __init__(self, path, buckets=1024, ways=4, slot_size=4096, lock_stripes=64, read_retries=100):
+        """
+        :param path: file path, the table is created if the file is empty,
+            otherwise its layout must be the same
+        """
+        self.path = path
+        self.read_retries = read_retries
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        try:
+            layout = (buckets, ways, slot_size, lock_stripes)
+            with self._file_lock(INIT_LOCK_OFFSET):
+                if os.fstat(self.fd).st_size == 0:
+                    os.ftruncate(self.fd, HEADER_SIZE + buckets * ways * slot_size)
+                    os.pwrite(self.fd, HEADER.pack(MAGIC, VERSION, *layout), 0)
+                else:
+                    magic, version, *existing_layout = HEADER.unpack(os.pread(self.fd, HEADER.size, 0))
+                    if magic != MAGIC or version != VERSION or tuple(existing_layout) != layout:
+                        raise ValueError('Shared memory table {} has different layout'.format(path))
+
+            self.buckets, self.ways, self.slot_size, self.lock_stripes = layout
+            self.capacity = slot_size - SLOT_HEADER.size
+            self.mmap = mmap.mmap(self.fd, HEADER_SIZE + buckets * ways * slot_size)
+        except Exception:
+            os.close(self.fd)
+            raise
+
+    @contextmanager
+    def _file_lock(self, offset):
+        # lock of a single byte, locks of the same process don't conflict,
+        # so nothing is awaited while the lock is held
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, offset)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, offset)
+
+    def _bucket_lock(self, bucket):
+        return self._file_lock(INIT_LOCK_OFFSET + 1 + bucket % self.lock_stripes)
+
+    def _get_bucket(self, key):
+        return zlib.crc32(key) % self.buckets
+
+    def _get_offsets(self, bucket):
+        start = HEADER_SIZE + bucket * self.ways * self.slot_size
+        return range(start, start + self.ways * self.slot_size, self.slot_size)
+
+    def _read(self, offset, key=None):
+        """
+        :param key: value is read only if slot contains this key
+        :returns: tuple (slot header, key, value) or None if slot is changed by writers all the time
+        """
+        buf = self.mmap
+        data_offset = offset + SLOT_HEADER.size
+
+        for _ in range(self.read_retries):
+            header = SLOT_HEADER.unpack_from(buf, offset)
+            sequence, _, _, key_length, value_length = header
+            if sequence & 1:
+                continue
+
+            slot_key = buf[data_offset:data_offset + key_length]
+            value = None
+            if key is None or slot_key == key:
+                value = buf[data_offset + key_length:data_offset + key_length + value_length]
+
+            if SEQUENCE.unpack_from(buf, offset)[0] == sequence:
+                return header, slot_key, value
+        return None
+
+    def _write(self, offset, key=b'', value=b'', deadline=0.0, now=0.0):
+        buf = self.mmap
+        sequence = SEQUENCE.unpack_from(buf, offset)[0]
+        SEQUENCE.pack_into(buf, offset, sequence + 1)
+
+        data_offset = offset + SLOT_HEADER.size
+        SLOT_HEADER.pack_into(buf, offset, sequence + 1, now, deadline, len(key), len(value))
+        buf[data_offset:data_offset + len(key)] = key
+        buf[data_offset + len(key):data_offset + len(key) + len(value)] = value
+
+        SEQUENCE.pack_into(buf, offset, sequence + 2)
+
+    def _find(self, key, bucket):
+        """ :returns: offset of slot containing key or None, must be called by writers only """
+        for offset in self._get_offsets(bucket):
+            key_length = SLOT_HEADER.unpack_from(self.mmap, offset)[3]
+            data_offset = offset + SLOT_HEADER.size
+            if key_length == len(key) and self.mmap[data_offset:data_offset + key_length] == key:
+                return offset
+        return None
+
+    def _lookup(self, key):
+        """ :returns: tuple (deadline, value) or None if key isn't found or expired """
+        now = time()
+
+        for offset in self._get_offsets(self._get_bucket(key)):
+            result = self._read(offset, key)
+            if result is None:
+                continue
+
+            header, slot_key, value = result
+            if slot_key == key and header[3]:
+                deadline = header[2]
+                if deadline and deadline < now:
+                    return None
+                return deadline, value
+        return None
+
+    def get(self, key):
+        """ :returns: value or None if key isn't found or expired """
+        result = self._lookup(key)
+        return None if result is None else result[1]
+
+    def ttl(self, key):
+        """ :returns: remaining time to live in seconds, None if key has no expiration or isn't found """
+        result = self._lookup(key)
+        if result is None or not result[0]:
+            return None
+        return result[0] - time()
+
+    def set(self, key, value, deadline=0.0, only_new=False):
+        """
+        :param deadline: `time.time()` timestamp of expiration, 0 - no expiration
+        :param only_new: value isn't saved if key exists and isn't expired
+        :returns: True if value is saved
+        """
+        if len(key) + len(value) > self.capacity or not 0 < len(key) <= 0xFFFF:
+            # value doesn't fit the slot, the previous one is outdated
+            self.delete(key)
+            return False
+
+        bucket = self._get_bucket(key)
+        now = time()
+
+        with self._bucket_lock(bucket):
+            offset = self._find(key, bucket)
+            if offset is None:
+                offset = self._choose_slot(bucket, now)
+            elif only_new:
+                existing_deadline = SLOT_HEADER.unpack_from(self.mmap, offset)[2]
+                if not existing_deadline or existing_deadline >= now:
+                    return False
+
+            self._write(offset, key, value, deadline, now)
+        return True
+
+    def _choose_slot(self, bucket, now):
+        """ :returns: offset of empty or expired slot, the least recently written one otherwise """
+        oldest_offset, oldest_time = None, None
+
+        for offset in self._get_offsets(bucket):
+            _, written, deadline, key_length, _ = SLOT_HEADER.unpack_from(self.mmap, offset)
+            if not key_length or (deadline and deadline < now):
+                return offset
+            if oldest_time is None or written < oldest_time:
+                oldest_offset, oldest_time = offset, written
+        return oldest_offset
+
+    def delete(self, key, value=None):
+        """
+        :param value: key is deleted only if it has this value
+        :returns: True if key is deleted
+        """
+        bucket = self._get_bucket(key)
+
+        with self._bucket_lock(bucket):
+            offset = self._find(key, bucket)
+            if offset is None:
+                return False
+
+            if value is not None:
+                _, _, slot_value = self._read(offset, key)
+                if slot_value != value:
+                    return False
+
+            self._write(offset)
+        return True
+
+    def items(self):
+        """ :returns: list of (key, value) pairs of not expired keys, e.g. for debugging """
+        result = []
+        now = time()
+
+        for bucket in range(self.buckets):
+            for offset in self._get_offsets(bucket):
+                slot = self._read(offset)
+                if slot is None:
+                    continue
+
+                header, key, value = slot
+                if header[3] and not (header[2] and header[2] < now):
+                    result.append((key, value))
+        return result
+
+    def clear(self):
+        for bucket in range(self.buckets):
+            with self._bucket_lock(bucket):
+                for offset in self._get_offsets(bucket):
+                    if SLOT_HEADER.unpack_from(self.mmap, offset)[3]:
+                        self._write(offset)
+
+    def close(self):
+        self.mmap.close()
+        os.close(self.fd)
+
+
+def get_deadline(timeout):
+    if not timeout or timeout is DEFAULT_TIMEOUT:
+        return 0.0
+    return time() + timeout
+
+
+class SharedMemoryCacheBackend(SerializerMixin, BaseCacheBackend):
+    """Cache backend shared by processes of a host without network requests.
+
+    Instance of `SharedMemoryTable` must be passed to init, every process
+    opens the same file. Values are serialized, values which don't fit
+    table slot aren't saved. Locks are shared by processes as well.
+    Unix only, since `fcntl` locks are used.
+    """
+
+    def __init__(self, client, **options):
+        """
+        :type client: SharedMemoryTable
+        """
+        self.client = client
+        super().__init__(**options)
+
+    @staticmethod
+    def encode_key(key):
+        return key.encode() if isinstance(key, str) else key
+
+    async def get(self, key, default=NOT_FOUND):
+        result = self.client.get(self.encode_key(self.make_key(key)))
+        return default if result is None else self.load_value(result)
+
+    async def get_many(self, keys, default=None):
+        result = {}
+        for key in keys:
+            data = self.client.get(self.encode_key(self.make_key(key)))
+            result[key] = default if data is None else self.load_value(data)
+        return result
+
+    def _set(self, key, value, timeout, serializer):
+        saved = self.client.set(
+            self.encode_key(self.make_key(key)), self.dump_value(value, serializer), get_deadline(timeout)
+        )
+        if not saved:
+            self.stats['too_large'] += 1
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, serializer=None):
+        """
+        :param timeout: must be in seconds
+        :param serializer: overrides backend serializer
+        """
+        self._set(key, value, self.make_timeout(timeout), serializer)
+
+    async def set_many(self, data_dict: dict, timeout=DEFAULT_TIMEOUT, serializer=None, timeouts=None):
+        timeout = self.make_timeout(timeout)
+
+        for key, value in data_dict.items():
+            if timeouts and key in timeouts:
+                self._set(key, value, self.make_timeout(timeouts[key]), serializer)
+            else:
+                self._set(key, value, timeout, serializer)
+
+    async def delete(self, key):
+        return self.client.delete(self.encode_key(self.make_key(key)))
+
+    async def acquire_lock(self, key, timeout):
+        """
+        Lock is a key saved only if it doesn't exist, so it's held by a single process of the host.
+
+        :param timeout: lock expiration time in seconds
+        :returns: token required to release the lock or `None` if lock is held by someone else
+        """
+        token = uuid.uuid4().hex
+        acquired = self.client.set(self.encode_key(self.make_key(key)), token.encode(), time() + timeout, only_new=True)
+        return token if acquired else None
+
+    async def release_lock(self, key, token):
+        """ Expired or re-acquired by someone else lock is left untouched """
+        return self.client.delete(self.encode_key(self.make_key(key)), token.encode())
+
+    async def close(self):
+        self.client.close()
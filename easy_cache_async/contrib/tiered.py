@@ -0,0 +1,138 @@
+from collections import Counter
+
+from .base import BaseCacheBackend
+from ..core import DEFAULT_TIMEOUT, NOT_FOUND
+
+
+class TieredCacheBackend(BaseCacheBackend):
+    """Two-tier cache: near in-process cache (L1, e.g. `LocMemCacheBackend`)
+    in front of remote one (L2, e.g. `RedisCacheBackend`).
+
+    Values are read from L1 first, values found in L2 are saved to L1
+    for `local_timeout` seconds. Values are written to both tiers, L1 timeout
+    is never longer than `local_timeout`, so changes made by other processes
+    are noticed in `local_timeout` seconds at most.
+
+    Tags are usual cache keys, so `TaggedCacheProxy` reads tags versions
+    from L1 as well. Distributed locks of L2 are used if it supports them.
+
+    Keys written by this process are published to `invalidation_bus`
+    (taken from L1 by default), so other processes evict them from their L1.
+    """
+
+    def __init__(self, local, remote, **options):
+        """
+        :type local: BaseCacheBackend
+        :type remote: BaseCacheBackend
+        """
+        self.local = local
+        self.remote = remote
+        super().__init__(**options)
+
+        self.local_timeout = options.get('local_timeout', 5)
+        # values are saved in the same format to both tiers
+        self.tagged_values = getattr(remote, 'tagged_values', False)
+        if 'tags_timeout' not in options:
+            self.tags_timeout = getattr(remote, 'tags_timeout', None)
+        self.invalidation_bus = options.get('invalidation_bus', getattr(local, 'invalidation_bus', None))
+        # counters: "local_hits", "remote_hits" and "misses"
+        self.stats = Counter()
+
+    def __getattr__(self, item):
+        # locks must be shared between processes
+        remote = self.__dict__.get('remote')
+        if remote is not None and item in ('acquire_lock', 'release_lock'):
+            return getattr(remote, item)
+        raise AttributeError(item)
+
+    def make_local_timeout(self, timeout):
+        """ :returns: L1 timeout for value saved to L2 with provided timeout """
+        if timeout is DEFAULT_TIMEOUT and hasattr(self.remote, 'make_timeout'):
+            timeout = self.remote.make_timeout(timeout)
+        timeout = self.make_timeout(timeout)
+
+        if not timeout or timeout is DEFAULT_TIMEOUT:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    async def get(self, key, default=NOT_FOUND):
+        value = await self.local.get(key, NOT_FOUND)
+        if value is not NOT_FOUND:
+            self.stats['local_hits'] += 1
+            return value
+
+        value = await self.remote.get(key, NOT_FOUND)
+        if value is NOT_FOUND:
+            self.stats['misses'] += 1
+            return default
+
+        self.stats['remote_hits'] += 1
+        await self.local.set(key, value, self.local_timeout)
+        return value
+
+    async def get_many(self, keys, default=None):
+        """ Keys missed in L1 are read from L2 with single request """
+        result = await self.local.get_many(keys, NOT_FOUND)
+        missed = [key for key, value in result.items() if value is NOT_FOUND]
+        self.stats['local_hits'] += len(result) - len(missed)
+
+        if not missed:
+            return result
+
+        found = {
+            key: value for key, value in (await self.remote.get_many(missed, NOT_FOUND)).items()
+            if value is not NOT_FOUND
+        }
+        self.stats['remote_hits'] += len(found)
+        self.stats['misses'] += len(missed) - len(found)
+
+        if found:
+            await self.local.set_many(found, self.local_timeout)
+        for key in missed:
+            result[key] = found.get(key, default)
+        return result
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, **kwargs):
+        result = await self.remote.set(key, value, timeout, **kwargs)
+        await self.local.set(key, value, self.make_local_timeout(timeout))
+        self.publish([key])
+        return result
+
+    async def set_many(self, data_dict, timeout=DEFAULT_TIMEOUT, timeouts=None, **kwargs):
+        if not timeouts:
+            result = await self.remote.set_many(data_dict, timeout, **kwargs)
+            await self.local.set_many(data_dict, self.make_local_timeout(timeout))
+            self.publish(data_dict)
+            return result
+
+        result = await self.remote.set_many(data_dict, timeout, timeouts=timeouts, **kwargs)
+        await self.local.set_many(
+            data_dict,
+            self.make_local_timeout(timeout),
+            timeouts={key: self.make_local_timeout(value) for key, value in timeouts.items()},
+        )
+        self.publish(data_dict)
+        return result
+
+    async def set_tag_versions(self, data_dict, timeout=DEFAULT_TIMEOUT):
+        """ Invalidated tags are saved to L2 with its `set_tag_versions` if it's supported """
+        set_many = getattr(self.remote, 'set_tag_versions', self.remote.set_many)
+        result = await set_many(data_dict, timeout)
+        await self.local.set_many(data_dict, self.make_local_timeout(timeout))
+        self.publish(data_dict)
+        return result
+
+    async def delete(self, key):
+        await self.local.delete(key)
+        result = await self.remote.delete(key)
+        self.publish([key])
+        return result
+
+    def publish(self, keys):
+        """ Other processes are notified that keys are changed """
+        if self.invalidation_bus is not None:
+            self.invalidation_bus.publish(keys)
+
+    async def close(self):
+        if hasattr(self.remote, 'close'):
+            await self.remote.close()
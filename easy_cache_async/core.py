@@ -1,12 +1,16 @@
+import asyncio
 import collections
 import inspect
 import logging
 import os
 import threading
-from time import time
+from functools import partial
+from math import log
+from random import random
+from time import monotonic, time
 from typing import Callable
 
-from .utils import force_text, get_function_path, getargspec
+from .utils import ArgumentsBinder, CompiledTemplate, force_text, get_function_path, getargspec
 
 
 logger = logging.getLogger(__name__)
@@ -30,6 +34,15 @@ NOT_SET = Value('NOT_SET')
 DEFAULT_TIMEOUT = Value('DEFAULT_TIMEOUT')
 CACHE_KEY_DELIMITER = force_text(':')
 TAG_KEY_PREFIX = force_text('tag')
+LOCK_KEY_PREFIX = force_text('lock')
+# reserved key of dict wrapping value saved with expiration metadata, see `make_envelope`
+ENVELOPE_KEY = '__easy_cache_async_envelope__'
+# token returned by `acquire_lock` of backends when lock is not taken since the backend is unavailable
+BYPASS_LOCK_TOKEN = 'bypass-lock'
+
+# bounds of delay (in seconds) between polls of a value locked by another process
+LOCK_POLL_MIN_DELAY = 0.01
+LOCK_POLL_MAX_DELAY = 0.25
 
 LAZY_MODE = os.environ.get('EASY_CACHE_ASYNC_LAZY_MODE_ENABLE', '') == 'yes'
 DEFAULT_CACHE_ALIAS = 'default-easy-cache-async'
@@ -133,6 +146,10 @@ def create_tag_cache_key(*parts):
     return create_cache_key(TAG_KEY_PREFIX, *parts)
 
 
+def create_lock_cache_key(*parts):
+    return create_cache_key(LOCK_KEY_PREFIX, *parts)
+
+
 def get_timestamp():
     return int(time() * 1000000)
 
@@ -142,11 +159,59 @@ def compare_dicts(d1, d2):
     return dict(d1) == dict(d2)
 
 
+def make_envelope(value, expires_at, delta=None):
+    """ Wraps cached value with its expiration timestamp and time spent
+        to compute it (both in microseconds), envelope is a simple dict
+        to be compatible with any serializer, it's marked with reserved key,
+        so dicts returned by decorated functions are never confused with it.
+    """
+    return {ENVELOPE_KEY: [value, expires_at, delta]}
+
+
+def parse_envelope(data):
+    """ :returns: tuple (value, expires_at, delta), values saved
+        without envelope are considered as never expiring.
+    """
+    if isinstance(data, dict) and len(data) == 1 and ENVELOPE_KEY in data:
+        value, expires_at, delta = data[ENVELOPE_KEY]
+        return value, expires_at, delta
+    return data, None, None
+
+
+class TaggedValue(collections.namedtuple('TaggedValue', ['tags', 'value'])):
+    """ Value saved by TaggedCacheProxy with versions of its tags,
+        serializers of contrib backends write it as compact binary envelope.
+    """
+    __slots__ = ()
+
+
+def parse_tagged_value(data):
+    """ :returns: tuple (tags, value), both `TaggedValue` and dicts
+        saved by previous versions are supported.
+    """
+    if isinstance(data, TaggedValue):
+        return data
+    if isinstance(data, dict) and 'tags' in data:
+        return data['tags'], data.get('value')
+    return None, data
+
+
+def should_recompute_early(now, expires_at, delta, beta):
+    """ Probabilistic early expiration (XFetch): the closer expiration time
+        and the longer computation the more chances to recompute the value.
+    """
+    return now - delta * beta * log(1.0 - random()) >= expires_at
+
+
 class MetaCallable(collections.Mapping):
     """Object contains meta information about method or function decorated with ecached:
     passed arguments, returned results, signature description and so on.
     """
 
+    __slots__ = (
+        'args', 'kwargs', 'returned_value', 'call_args', 'function', 'scope', 'duration',
+    )
+
     def __init__(self, args=(), kwargs=None, returned_value=NOT_SET, call_args=None):
         self.args = args
         self.kwargs = kwargs or {}
@@ -154,6 +219,8 @@ class MetaCallable(collections.Mapping):
         self.call_args = call_args or {}
         self.function = None
         self.scope = None
+        # time spent in decorated function call (seconds)
+        self.duration = None
 
     def __contains__(self, item):
         return item in self.call_args
@@ -175,6 +242,56 @@ class MetaCallable(collections.Mapping):
         return self.returned_value is not NOT_SET
 
 
+class TagVersionsCache:
+    """ In-process cache of tags timestamps (versions), allows to validate
+        tagged values without reading tags from cache backend on every hit.
+        Tags invalidated by other processes are noticed in `ttl` seconds at most.
+    """
+    def __init__(self, ttl, maxsize=1024):
+        """
+            :param ttl: number of seconds tag version is trusted without re-reading
+            :param maxsize: max number of tags, the oldest ones are evicted first
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # counters: "hits" and "misses"
+        self.stats = collections.Counter()
+        # tag cache key -> (timestamp, deadline)
+        self._data = collections.OrderedDict()
+
+    def get_many(self, keys):
+        """ :returns: dict with all tags versions or None if any of them is unknown """
+        now = monotonic()
+        versions = {}
+
+        for key in keys:
+            item = self._data.get(key)
+            if item is None or item[1] <= now:
+                self.stats['misses'] += 1
+                return None
+            versions[key] = item[0]
+
+        self.stats['hits'] += 1
+        return versions
+
+    def set_many(self, versions):
+        deadline = monotonic() + self.ttl
+        data = self._data
+
+        for key, version in versions.items():
+            if version is None:
+                data.pop(key, None)
+                continue
+            data[key] = (version, deadline)
+            data.move_to_end(key)
+
+        while len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
 class TaggedCacheProxy:
     """ Each cache key/value pair can have additional tags to check
         if cached values is still valid.
@@ -182,30 +299,59 @@ class TaggedCacheProxy:
     def __init__(self, cache_instance):
         """
             :param cache_instance: should support `set_many` and
-            `get_many` operations
+            `get_many` operations, `tag_versions` attribute is used
+            to validate tags locally if it's provided, values are saved
+            as `TaggedValue` if `tagged_values` attribute is true, tags keys
+            timeout is overridden with `tags_timeout` attribute
         """
         self._cache_instance = cache_instance
+        self._tag_versions = getattr(cache_instance, 'tag_versions', None)  # type: TagVersionsCache
+        self._tagged_values = getattr(cache_instance, 'tagged_values', False)
+        self._tags_timeout = getattr(cache_instance, 'tags_timeout', None)
+
+    async def get_tags(self, tags):
+        """ Reads tags from cache backend, local tags versions are updated as well """
+        tags_dict = await self._cache_instance.get_many(tags)  # type: dict
+        if self._tag_versions is not None:
+            self._tag_versions.set_many(tags_dict)
+        return tags_dict
 
     async def make_value(self, key, value, tags):
+        return await self.make_values({key: value}, {key: tags})
+
+    async def make_values(self, data_dict, tags):
+        """ Tags of all values are read with single request
+            :param tags: dict, key -> list of tags
+        """
         data = {}
-        tags = [create_tag_cache_key(_) for _ in tags]
+        keys_tags = {key: [create_tag_cache_key(_) for _ in tags[key]] for key in data_dict}
+        all_tags = list({tag_key for tag_keys in keys_tags.values() for tag_key in tag_keys})
 
         # get tags and their cached values (if exists)
-        tags_dict = await self._cache_instance.get_many(tags)  # type: dict
+        tags_dict = await self.get_tags(all_tags)
 
         # set new timestamps for missed tags
-        for tag_key in tags:
+        for tag_key in all_tags:
             if tags_dict.get(tag_key) is None:
                 # this should be sent to cache as separate key-value
                 data[tag_key] = get_timestamp()
 
         tags_dict.update(data)
+        if self._tag_versions is not None:
+            self._tag_versions.set_many(data)
 
-        data[key] = {
-            'value': value,
+        for key, value in data_dict.items():
             # remove tags with None value
-            'tags': {k: v for k, v in tags_dict.items() if v is not None},
-        }
+            value_tags = {k: tags_dict[k] for k in keys_tags[key] if tags_dict[k] is not None}
+
+            if self._tagged_values:
+                data[key] = TaggedValue(value_tags, value)
+            else:
+                data[key] = {
+                    # tags go first, so they may be parsed without reading the whole value
+                    'tags': value_tags,
+                    'value': value,
+                }
 
         return data
 
@@ -213,34 +359,108 @@ class TaggedCacheProxy:
         return getattr(self._cache_instance, item)
 
     async def set(self, key, value, *args, **kwargs):
-        value_dict = await self.make_value(key, value, kwargs.pop('tags'))
+        kwargs['tags'] = {key: kwargs['tags']}
+        return await self.set_many({key: value}, *args, **kwargs)
+
+    async def set_many(self, data_dict, *args, **kwargs):
+        """ :param tags: dict, key -> list of tags """
+        value_dict = await self.make_values(data_dict, kwargs.pop('tags'))
+        tag_keys = [key for key in value_dict if key not in data_dict]
+
+        if self._tags_timeout is not None:
+            # new tags are saved along with values, but may live longer
+            kwargs['timeouts'] = {key: self._tags_timeout for key in tag_keys}
+
+        if tag_keys and kwargs.get('serializer') is not None:
+            # tags are shared by all the functions and validated by backend scripts,
+            # so they are saved with backend serializer, not the function one
+            tags_kwargs = {k: v for k, v in kwargs.items() if k != 'serializer'}
+            await self._cache_instance.set_many({key: value_dict.pop(key) for key in tag_keys}, *args, **tags_kwargs)
+            kwargs.pop('timeouts', None)
+
         return await self._cache_instance.set_many(value_dict, *args, **kwargs)
 
+    async def get_many(self, keys, default=None):
+        """ Gets many values, tags of all of them are validated with single request
+            :returns: dict, key -> value or `default` if value is not found or invalid
+        """
+        values = {
+            key: None if value is NOT_FOUND else parse_tagged_value(value)
+            for key, value in (await self._cache_instance.get_many(keys, NOT_FOUND)).items()
+        }
+        tags = set()
+
+        for value in values.values():
+            if value is not None:
+                tags.update(value[0] or ())
+
+        def is_valid(value):
+            return compare_dicts({k: versions.get(k) for k in value[0]}, value[0])
+
+        tagged = [v for v in values.values() if v is not None and v[0]]
+
+        # recently read versions are trusted
+        versions = None
+        if tagged and self._tag_versions is not None:
+            versions = self._tag_versions.get_many(tags)
+            if versions is not None and not all(is_valid(v) for v in tagged):
+                versions = None
+
+        if tagged and versions is None:
+            versions = await self.get_tags(list(tags))
+
+        return {
+            key: value[1] if value is not None and (
+                not value[0] or is_valid(value)
+            ) else default
+            for key, value in values.items()
+        }
+
     async def get(self, key, default=None, **kwargs):
-        value = await self._cache_instance.get(key, default=NOT_FOUND, **kwargs)
+        if hasattr(self._cache_instance, 'get_tagged'):
+            # backend is able to validate tags by itself
+            value, validated = await self._cache_instance.get_tagged(key, NOT_FOUND, **kwargs)
+            if validated:
+                return parse_tagged_value(value)[1]
+        else:
+            value = await self._cache_instance.get(key, default=NOT_FOUND, **kwargs)
 
         # not found in cache
         if value is NOT_FOUND:
             return default
 
-        tags_dict = value.get('tags')
+        tags_dict, value = parse_tagged_value(value)
         if not tags_dict:
             return value
 
-        # check if it has valid tags
-        cached_tags_dict = await self._cache_instance.get_many(tags_dict.keys())
+        # check if it has valid tags, recently read versions are trusted
+        if self._tag_versions is not None:
+            cached_tags_dict = self._tag_versions.get_many(tags_dict)
+            if cached_tags_dict is not None and compare_dicts(cached_tags_dict, tags_dict):
+                return value
+
+        cached_tags_dict = await self.get_tags(tags_dict.keys())
 
         # compare dicts
         if not compare_dicts(cached_tags_dict, tags_dict):
             # cache is invalid - return default value
             return default
 
-        return value.get('value', default)
+        return value
 
     async def invalidate(self, tags):
         """ Invalidates cache by tags """
         ts = get_timestamp()
-        return await self._cache_instance.set_many({create_tag_cache_key(tag): ts for tag in tags})
+        data = {create_tag_cache_key(tag): ts for tag in tags}
+
+        if self._tag_versions is not None:
+            self._tag_versions.set_many(data)
+
+        # backend may save invalidated tags more reliably than ordinary values
+        set_many = getattr(self._cache_instance, 'set_tag_versions', self._cache_instance.set_many)
+        if self._tags_timeout is not None:
+            return await set_many(data, self._tags_timeout)
+        return await set_many(data)
 
 
 class Cached:
@@ -251,22 +471,56 @@ class Cached:
                  timeout=DEFAULT_TIMEOUT,
                  cache_instance=None,
                  cache_alias=None,
-                 as_property=False):
+                 as_property=False,
+                 coalesce=False,
+                 lock_timeout=None,
+                 stale_ttl=None,
+                 early_recompute_beta=None,
+                 batch_window_ms=None,
+                 bulk_loader=None,
+                 serializer=None):
+
+        if batch_window_ms is not None and (coalesce or lock_timeout is not None):
+            # batched calls are processed together, their misses aren't coalesced or locked
+            raise ValueError('batch_window_ms is not compatible with coalesce and lock_timeout')
 
         # processing different types of cache_key parameter
         self._function = None
+        self._binder = None
         self.is_coroutine = False
 
         self.cache_key = cache_key
         self.function = function
         self.as_property = as_property
         self.timeout = timeout
+        self.coalesce = coalesce
+        self.lock_timeout = lock_timeout
+        self.stale_ttl = stale_ttl
+        self.early_recompute_beta = early_recompute_beta
+        self.batch_window_ms = batch_window_ms
+        self.bulk_loader = bulk_loader
+        self.serializer = serializer
         self.instance = None
         self.klass = None
 
+        # counters, e.g. number of coalesced calls
+        self.stats = collections.Counter()
+
         self._scope = None
         self._cache_instance = cache_instance
         self._cache_alias = cache_alias or DEFAULT_CACHE_ALIAS
+        # cache key -> future with result of currently executed callable
+        self._in_flight = {}
+        # cache key -> task refreshing its value in background
+        self._refreshing = {}
+        # calls waiting for batch window to be closed
+        self._batch = []
+        # tasks processing flushed batches
+        self._batches = set()
+        # parsed string templates and callable templates signatures
+        self._compiled_templates = {}
+        self._meta_required = {}
+        self._list_cache_key_template = (None, None)
 
     @property
     def cache_key_template(self):
@@ -274,9 +528,14 @@ class Cached:
         if self.cache_key is None:
             return self.create_cache_key
         elif isinstance(self.cache_key, (list, tuple)):
-            return create_cache_key(
-                force_text(key).join(('{', '}')) for key in self.cache_key
-            )
+            # built once, but delimiter may be changed globally
+            delimiter, template = self._list_cache_key_template
+            if delimiter != CACHE_KEY_DELIMITER:
+                template = create_cache_key(
+                    force_text(key).join(('{', '}')) for key in self.cache_key
+                )
+                self._list_cache_key_template = (CACHE_KEY_DELIMITER, template)
+            return template
         else:
             return self.cache_key
 
@@ -288,6 +547,8 @@ class Cached:
     def function(self, value):
         self._function = value
         self.is_coroutine = inspect.iscoroutinefunction(value)
+        # signature is analyzed only once, not on every call
+        self._binder = ArgumentsBinder(value) if value else None
 
     @property
     def scope(self):
@@ -317,26 +578,355 @@ class Cached:
     cache_instance = property(_get_cache_instance)
 
     async def __call__(self, *args, **kwargs):
-        callable_meta = self.collect_meta(args, kwargs)
-        cache_key = self.generate_cache_key(callable_meta)
+        args, kwargs = self.update_arguments(args, kwargs)
+        return await self._call_cached(args, kwargs, self.scope)
+
+    async def _call_cached(self, args, kwargs, scope):
+        """ Main logic of cached call, shared with bound objects
+            :param args: positional arguments, including instance or class
+            :param scope: instance or class or None
+        """
+        if self.batch_window_ms is not None:
+            return await self._call_batched(args, kwargs, scope)
+
+        callable_meta = None
+        cache_key = self._generate_cache_key_from_arguments(args, kwargs)
+
+        if cache_key is None:
+            callable_meta = self._collect_meta(args, kwargs, scope)
+            cache_key = self.generate_cache_key(callable_meta)
+
         cached_value = await self.get_cached_value(cache_key)
 
         if cached_value is NOT_FOUND:
             logger.debug('MISS cache_key="%s"', cache_key)
-            value = self.function(*callable_meta.args, **callable_meta.kwargs)
-            if self.is_coroutine:
-                value = await value
+            if callable_meta is None:
+                callable_meta = self._collect_meta(args, kwargs, scope)
+            if self.coalesce:
+                return await self._call_function_coalesced(cache_key, callable_meta)
+            return await self._call_function_on_miss(cache_key, callable_meta)
+
+        logger.debug('HIT cache_key="%s"', cache_key)
+        return self._process_hit(cache_key, cached_value, args, kwargs, scope)
 
-            callable_meta.returned_value = value
-            await self.set_cached_value(cache_key, callable_meta)
+    def _process_hit(self, cache_key, cached_value, args, kwargs, scope):
+        """ :returns: value to return from cache hit, refresh is scheduled if required """
+        # values are unwrapped even if options are changed since they were saved
+        value, expires_at, delta = parse_envelope(cached_value)
+        if expires_at is None:
             return value
 
-        logger.debug('HIT cache_key="%s"', cache_key)
-        return cached_value
+        now = get_timestamp()
+
+        if expires_at <= now:
+            self.stats['stale'] += 1
+            logger.debug('STALE cache_key="%s"', cache_key)
+            self._refresh_in_background(cache_key, args, kwargs, scope)
+        elif self.early_recompute_beta and delta and should_recompute_early(
+                now, expires_at, delta, self.early_recompute_beta):
+            self.stats['early_recomputes'] += 1
+            logger.debug('EARLY RECOMPUTE cache_key="%s"', cache_key)
+            self._refresh_in_background(cache_key, args, kwargs, scope)
+
+        return value
+
+    @property
+    def uses_envelope(self):
+        """ Values are saved with expiration metadata """
+        return self.stale_ttl is not None or bool(self.early_recompute_beta)
+
+    def _refresh_in_background(self, cache_key, args, kwargs, scope):
+        """ Schedules single refresh task per cache key """
+        if cache_key in self._refreshing:
+            return
+
+        logger.debug('REFRESH cache_key="%s"', cache_key)
+        callable_meta = self._collect_meta(args, kwargs, scope)
+        task = asyncio.ensure_future(self._call_function(cache_key, callable_meta))
+        # reference to the task is kept until it's done
+        self._refreshing[cache_key] = task
+        task.add_done_callback(partial(self._on_background_refresh_done, cache_key))
+
+    def _on_background_refresh_done(self, cache_key, task):
+        self._refreshing.pop(cache_key, None)
+
+        if not task.cancelled() and task.exception() is not None:
+            self.stats['refresh_errors'] += 1
+            logger.error(
+                'REFRESH FAILED cache_key="%s"', cache_key, exc_info=task.exception()
+            )
+
+    async def _call_function_on_miss(self, cache_key, callable_meta):
+        if self.lock_timeout is None:
+            return await self._call_function(cache_key, callable_meta)
+        return await self._call_function_locked(cache_key, callable_meta)
+
+    async def _call_function(self, cache_key, callable_meta):
+        """ Calls decorated function and saves returned value to cache """
+        value = await self._execute(callable_meta)
+        await self.set_cached_value(cache_key, callable_meta)
+        return value
+
+    async def _execute(self, callable_meta):
+        """ Calls decorated function, returned value and duration are saved to meta """
+        started = time()
+        value = self.function(*callable_meta.args, **callable_meta.kwargs)
+        if self.is_coroutine:
+            value = await value
+
+        callable_meta.duration = time() - started
+        callable_meta.returned_value = value
+        return value
+
+    @staticmethod
+    def _split_arguments(arguments):
+        if isinstance(arguments, tuple):
+            return arguments, {}
+        if isinstance(arguments, dict):
+            return (), arguments
+        return (arguments, ), {}
+
+    async def call_many(self, arguments, bulk_loader=None):
+        """ Gets cached results for many calls at once: all values are read with
+            single `get_many` request and missed ones are saved with `set_many`.
+
+            :param arguments: iterable, every item is a tuple of positional arguments,
+            a dict of keyword arguments or a single positional argument
+            :param bulk_loader: callable (or coroutine function) accepting list of
+            MetaCallable objects of missed calls and returning list of values
+            in the same order, decorated function is called concurrently otherwise
+            :returns: list of results in the same order as arguments
+        """
+        calls = []
+        scope = self.scope
+        for item in arguments:
+            args, kwargs = self.update_arguments(*self._split_arguments(item))
+            calls.append((args, kwargs, scope))
+        return await self._call_many_cached(calls, bulk_loader or self.bulk_loader)
+
+    async def _call_many_cached(self, calls, bulk_loader=None):
+        """ :param calls: list of (args, kwargs, scope) tuples
+            :returns: list of results, the first exception of failed calls is raised
+        """
+        cache_keys, results, errors = await self._call_many(calls, bulk_loader)
+
+        for cache_key in cache_keys:
+            if cache_key in errors:
+                raise errors[cache_key]
+        return [results[cache_key] for cache_key in cache_keys]
+
+    async def _call_many(self, calls, bulk_loader=None):
+        """ :param calls: list of (args, kwargs, scope) tuples
+            :returns: tuple (cache keys of calls, dict cache key -> result, dict cache key -> exception)
+        """
+        cache_keys = []
+        metas = {}
+
+        for args, kwargs, scope in calls:
+            cache_key = self._generate_cache_key_from_arguments(args, kwargs)
+            if cache_key is None:
+                callable_meta = self._collect_meta(args, kwargs, scope)
+                cache_key = self.generate_cache_key(callable_meta)
+                metas[cache_key] = callable_meta
+            cache_keys.append(cache_key)
+
+        cached_values = await self.get_many_cached_values(list(set(cache_keys)))
+        results = {}
+        missed = {}
+
+        for cache_key, (args, kwargs, scope) in zip(cache_keys, calls):
+            if cache_key in results or cache_key in missed:
+                continue
+
+            cached_value = cached_values.get(cache_key, NOT_FOUND)
+            if cached_value is NOT_FOUND:
+                logger.debug('MISS cache_key="%s"', cache_key)
+                missed[cache_key] = metas.get(cache_key) or self._collect_meta(args, kwargs, scope)
+            else:
+                logger.debug('HIT cache_key="%s"', cache_key)
+                results[cache_key] = self._process_hit(cache_key, cached_value, args, kwargs, scope)
+
+        errors = {}
+        if missed:
+            values, errors = await self._call_function_many(missed, bulk_loader)
+            results.update(values)
+
+        return cache_keys, results, errors
+
+    async def _call_batched(self, args, kwargs, scope):
+        """ Call is postponed until batch window is closed, then all
+            collected calls are processed together with `call_many` logic.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        if not self._batch:
+            if self.batch_window_ms:
+                loop.call_later(self.batch_window_ms / 1000, self._flush_batch)
+            else:
+                # the same event loop iteration
+                loop.call_soon(self._flush_batch)
+
+        self._batch.append((args, kwargs, scope, future))
+        return await future
+
+    def _flush_batch(self):
+        batch, self._batch = self._batch, []
+        self.stats['batches'] += 1
+        task = asyncio.ensure_future(self._process_batch(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._on_batch_done)
+
+    def _on_batch_done(self, task):
+        self._batches.discard(task)
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('BATCH FAILED', exc_info=task.exception())
+
+    async def _process_batch(self, batch):
+        # cancelled callers are not interested in results anymore
+        batch = [item for item in batch if not item[3].done()]
+        if not batch:
+            return
+
+        try:
+            cache_keys, results, errors = await self._call_many([item[:3] for item in batch], self.bulk_loader)
+        except asyncio.CancelledError:
+            for *_, future in batch:
+                future.cancel()
+            raise
+        except Exception as ex:
+            # whole batch fails, e.g. bulk loader raised an exception
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(ex)
+        else:
+            # every caller gets its own result or exception
+            for (*_, future), cache_key in zip(batch, cache_keys):
+                if future.done():
+                    continue
+                if cache_key in errors:
+                    future.set_exception(errors[cache_key])
+                else:
+                    future.set_result(results[cache_key])
+
+    async def _call_function_many(self, missed, bulk_loader=None):
+        """ Calls decorated function (or bulk loader) for missed cache keys and
+            saves returned values with single `set_many` request.
+            :param missed: dict, cache key -> MetaCallable
+            :returns: tuple (dict cache key -> returned value, dict cache key -> raised exception),
+            results of failed calls are not saved, failed bulk loader fails all the calls
+        """
+        metas = list(missed.values())
+        errors = {}
+
+        if bulk_loader is None:
+            results = await asyncio.gather(*[self._execute(meta) for meta in metas], return_exceptions=True)
+            for cache_key, result in zip(missed, results):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                if isinstance(result, BaseException):
+                    errors[cache_key] = result
+        else:
+            started = time()
+            values = bulk_loader(metas)
+            if inspect.isawaitable(values):
+                values = await values
+
+            values = list(values)
+            if len(values) != len(metas):
+                raise ValueError('Bulk loader returned {} values for {} calls'.format(
+                    len(values), len(metas)))
+
+            duration = time() - started
+            for meta, value in zip(metas, values):
+                meta.returned_value = value
+                meta.duration = duration
+
+        succeeded = {cache_key: meta for cache_key, meta in missed.items() if cache_key not in errors}
+        if succeeded:
+            await self.set_many_cached_values(succeeded)
+        return {cache_key: meta.returned_value for cache_key, meta in succeeded.items()}, errors
+
+    async def _call_function_coalesced(self, cache_key, callable_meta):
+        """ Only one task calls decorated function for the same cache key,
+            all the callers wait for its result (or exception).
+        """
+        task = self._in_flight.get(cache_key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+            logger.debug('COALESCED cache_key="%s"', cache_key)
+        else:
+            task = asyncio.ensure_future(self._call_function_on_miss(cache_key, callable_meta))
+            task.add_done_callback(partial(self._on_in_flight_done, cache_key))
+            self._in_flight[cache_key] = task
+
+        # cancellation of any caller (including the first one) must not cancel the shared task
+        return await asyncio.shield(task)
+
+    def _on_in_flight_done(self, cache_key, task):
+        if self._in_flight.get(cache_key) is task:
+            del self._in_flight[cache_key]
+
+        # exception is raised to the callers, but nobody may be waiting
+        # if all of them are cancelled, so it's not logged as "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    async def _call_function_locked(self, cache_key, callable_meta):
+        """ Only lock holder calls decorated function, the others poll cache
+            until the value appears or lock timeout is reached.
+            Cache backend must support `acquire_lock` and `release_lock` operations,
+            otherwise the function is called without any lock.
+        """
+        cache_instance = self.cache_instance
+        if not hasattr(cache_instance, 'acquire_lock'):
+            return await self._call_function(cache_key, callable_meta)
+
+        lock_key = create_lock_cache_key(cache_key)
+        token = await cache_instance.acquire_lock(lock_key, self.lock_timeout)
+
+        if token is None:
+            self.stats['lock_waits'] += 1
+            logger.debug('LOCKED cache_key="%s"', cache_key)
+
+            value = await self._wait_for_cached_value(cache_key)
+            if value is not NOT_FOUND:
+                return self._unpack_cached_value(value)
+
+            # lock holder is too slow or dead, so calculate the value ourselves
+            self.stats['lock_timeouts'] += 1
+            logger.debug('LOCK TIMEOUT cache_key="%s"', cache_key)
+            return await self._call_function(cache_key, callable_meta)
+
+        try:
+            # value may be saved by the previous lock holder
+            value = await self.get_cached_value(cache_key)
+            if value is not NOT_FOUND:
+                return self._unpack_cached_value(value)
+            return await self._call_function(cache_key, callable_meta)
+        finally:
+            await cache_instance.release_lock(lock_key, token)
+
+    async def _wait_for_cached_value(self, cache_key):
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.lock_timeout
+        delay = LOCK_POLL_MIN_DELAY
+
+        while True:
+            await asyncio.sleep(min(delay, max(deadline - loop.time(), 0)))
+
+            value = await self.get_cached_value(cache_key)
+            if value is not NOT_FOUND or loop.time() >= deadline:
+                return value
+
+            delay = min(delay * 2, LOCK_POLL_MAX_DELAY)
 
     def create_cache_key(self, *args, **kwargs):
         """ if cache_key parameter is not specified we use default algorithm """
-        scope = self.scope
+        return self._create_cache_key(args, kwargs, self.scope)
+
+    def _create_cache_key(self, args, kwargs, scope):
         prefix = get_function_path(self.function, scope)
 
         args = list(args)
@@ -361,47 +951,90 @@ class Cached:
 
         return args, kwargs
 
-    def _clone(self, **kwargs):
-        cached = self.__class__(function=self.function, **kwargs)
-
-        cached.cache_key = self.cache_key
-        cached.as_property = self.as_property
-        cached.timeout = self.timeout
-
-        cached._cache_instance = self._cache_instance
-        cached._cache_alias = self._cache_alias
-        return cached
+    def _bind(self, instance, klass):
+        return BoundCached(self, instance, klass)
 
     def __get__(self, instance, klass):
-        cached = self._clone()
-
-        if cached.as_property and instance is None and klass is not None:
+        if self.as_property and instance is None and klass is not None:
             # special case – calling property as class
             # attr means that we want to run invalidation, so we out of any scope
-            return cached
+            return self._bind(None, None)
 
-        if instance:
-            cached.instance = instance
-        if klass:
-            cached.klass = klass
+        bound = self._bind(instance, klass)
 
-        if cached.as_property and instance is not None:
-            return cached()
+        if self.as_property and instance is not None:
+            return bound()
 
-        return cached
+        return bound
 
     async def get_cached_value(self, cache_key):
         logger.debug('Get cache_key="%s"', cache_key)
         return await self.cache_instance.get(cache_key, NOT_FOUND)
 
+    @staticmethod
+    def _unpack_cached_value(cached_value):
+        return parse_envelope(cached_value)[0]
+
+    def _pack_cached_value(self, callable_meta, timeout):
+        """ :returns: tuple (value to save, timeout) """
+        value = callable_meta.returned_value
+        if not self.uses_envelope:
+            return value, timeout
+
+        delta = None
+        if callable_meta.duration is not None:
+            delta = int(callable_meta.duration * 1000000)
+
+        if timeout is DEFAULT_TIMEOUT:
+            # backend decides what timeout to use
+            fresh_timeout = getattr(self.cache_instance, 'timeout', None)
+        else:
+            fresh_timeout = timeout
+
+        if not fresh_timeout:
+            # value never expires
+            return make_envelope(value, None, delta), timeout
+
+        expires_at = get_timestamp() + int(fresh_timeout * 1000000)
+        if self.stale_ttl is not None:
+            timeout = fresh_timeout + self.stale_ttl
+
+        return make_envelope(value, expires_at, delta), timeout
+
     async def set_cached_value(self, cache_key, callable_meta, **extra):
-        timeout = self.get_timeout(callable_meta)
+        value, timeout = self._pack_cached_value(callable_meta, self.get_timeout(callable_meta))
 
         if timeout is not DEFAULT_TIMEOUT:
             extra['timeout'] = timeout
+        if self.serializer is not None:
+            extra['serializer'] = self.serializer
 
         logger.debug('Set cache_key="%s" timeout="%s"', cache_key, extra.get('timeout'))
-        await self.cache_instance.set(cache_key, callable_meta.returned_value, **extra)
+        await self.cache_instance.set(cache_key, value, **extra)
+
+    async def get_many_cached_values(self, cache_keys):
+        logger.debug('Get cache_keys="%s"', cache_keys)
+        return await self.cache_instance.get_many(cache_keys, default=NOT_FOUND)
+
+    async def set_many_cached_values(self, metas, **extra):
+        """ Values with the same timeout are saved with single request
+            :param metas: dict, cache key -> MetaCallable
+        """
+        timeouts_data = collections.OrderedDict()
+        if self.serializer is not None:
+            extra['serializer'] = self.serializer
+
+        for cache_key, callable_meta in metas.items():
+            value, timeout = self._pack_cached_value(callable_meta, self.get_timeout(callable_meta))
+            timeouts_data.setdefault(timeout, {})[cache_key] = value
+
+        for timeout, data in timeouts_data.items():
+            timeout_extra = dict(extra)
+            if timeout is not DEFAULT_TIMEOUT:
+                timeout_extra['timeout'] = timeout
+
+            logger.debug('Set cache_keys="%s" timeout="%s"', list(data), timeout_extra.get('timeout'))
+            await self.cache_instance.set_many(data, **timeout_extra)
 
     @staticmethod
     def _check_if_meta_required(callable_template):
@@ -435,12 +1068,71 @@ class Cached:
 
         return False
 
+    def _is_meta_required(self, callable_template):
+        # bound methods are created on every attribute access, use underlying function
+        key = getattr(callable_template, '__func__', callable_template)
+
+        try:
+            return self._meta_required[key]
+        except KeyError:
+            required = self._meta_required[key] = self._check_if_meta_required(callable_template)
+            return required
+        except TypeError:
+            # unhashable callable
+            return self._check_if_meta_required(callable_template)
+
+    def _compile_template(self, template):
+        """ :returns: CompiledTemplate or None if template can't be compiled """
+        try:
+            return self._compiled_templates[template]
+        except KeyError:
+            compiled = self._compiled_templates[template] = CompiledTemplate.compile(template)
+            return compiled
+
+    def _format_string(self, template, call_args):
+        compiled = self._compile_template(template)
+        if compiled is None:
+            return force_text(template).format(**call_args)
+        return compiled.format(call_args)
+
+    def _format_from_arguments(self, template, args, kwargs):
+        """ Formats string template with passed arguments directly, without
+            collecting call meta, when it's possible.
+            :returns: formatted string or None
+        """
+        if not isinstance(template, str):
+            return None
+
+        compiled = self._compile_template(template)
+        binder = self._binder
+
+        if compiled is None or not compiled.names <= binder.names:
+            return None
+
+        try:
+            return compiled.format_arguments(binder, args, kwargs)
+        except KeyError:
+            return None
+
+    def _generate_cache_key_from_arguments(self, args, kwargs):
+        """ Fast path to generate cache key for simple string templates,
+            only named arguments of decorated function are supported.
+            :returns: cache key or None if `generate_cache_key` must be used
+        """
+        if self._binder is None:
+            return None
+
+        if not self._binder.is_simple_call(args, kwargs):
+            return None
+
+        return self._format_from_arguments(self.cache_key_template, args, kwargs)
+
     def _format(self, template, meta):
         if isinstance(template, (staticmethod, classmethod)):
             template = template.__func__
 
         if isinstance(template, collections.Callable):
-            if self._check_if_meta_required(template):
+            if self._is_meta_required(template):
                 value = template(meta)
             else:
                 value = template(*meta.args, **meta.kwargs)
@@ -455,9 +1147,9 @@ class Cached:
 
         try:
             if isinstance(template, str):
-                return force_text(template).format(**meta.call_args)
+                return self._format_string(template, meta.call_args)
             elif isinstance(template, (list, tuple, set, collections.Iterable)):
-                return [force_text(t).format(**meta.call_args) for t in template]
+                return [self._format_string(force_text(t), meta.call_args) for t in template]
         except KeyError as ex:
             raise ValueError('Parameter "%s" is required for "%s"' % (ex, template))
 
@@ -469,38 +1161,35 @@ class Cached:
     def collect_meta(self, args, kwargs, returned_value=NOT_SET):
         """ :returns: MetaCallable """
         args, kwargs = self.update_arguments(args, kwargs)
+        return self._collect_meta(args, kwargs, self.scope, returned_value)
 
+    def _collect_meta(self, args, kwargs, scope, returned_value=NOT_SET):
         meta = MetaCallable(args=args, kwargs=kwargs, returned_value=returned_value)
+        meta.scope = scope
 
-        if not self.function:
+        binder = self._binder
+        if binder is None:
             return meta
 
         # default arguments are also passed to template function
-        arg_spec = getargspec(self.function)
-        diff_count = len(arg_spec.args) - len(args)
-
-        # do not provide default arguments which were already passed
-        if diff_count > 0 and arg_spec.defaults:
-            # take minimum here
-            diff_count = min(len(arg_spec.defaults), diff_count)
-            default_kwargs = dict(zip(arg_spec.args[-diff_count:],
-                                      arg_spec.defaults[-diff_count:]))
-        else:
-            default_kwargs = {}
-
+        default_kwargs = binder.get_default_kwargs(len(args))
         default_kwargs.update(kwargs)
         meta.kwargs = default_kwargs
         meta.function = self.function
-        meta.scope = self.scope
 
         try:
-            meta.call_args = inspect.getcallargs(self.function, *args, **kwargs)
+            meta.call_args = binder.bind(args, kwargs)
         except TypeError:
             # sometimes not all required parameters are provided, just ignore them
             meta.call_args = meta.kwargs
         return meta
 
     def generate_cache_key(self, callable_meta):
+        if self.cache_key is None:
+            # the same as `create_cache_key`, but scope is taken from meta
+            return self._create_cache_key(
+                callable_meta.args, callable_meta.kwargs, callable_meta.scope
+            )
         return self._format(self.cache_key_template, callable_meta)
 
     async def invalidate_cache_by_key(self, *args, **kwargs):
@@ -513,13 +1202,7 @@ class Cached:
         cache_key = self.generate_cache_key(callable_meta)
 
         logger.debug('REFRESH cache_key="%s"', cache_key)
-        value = self.function(*callable_meta.args, **callable_meta.kwargs)
-        if self.is_coroutine:
-            value = await value
-
-        callable_meta.returned_value = value
-        await self.set_cached_value(cache_key, callable_meta)
-        return value
+        return await self._call_function(cache_key, callable_meta)
 
     def __str__(self):
         return (
@@ -547,7 +1230,14 @@ class TaggedCached(Cached):
                  cache_alias=None,
                  as_property=False,
                  tags=(),
-                 prefix=None):
+                 prefix=None,
+                 coalesce=False,
+                 lock_timeout=None,
+                 stale_ttl=None,
+                 early_recompute_beta=None,
+                 batch_window_ms=None,
+                 bulk_loader=None,
+                 serializer=None):
 
         super(TaggedCached, self).__init__(
             function=function,
@@ -556,10 +1246,18 @@ class TaggedCached(Cached):
             cache_alias=cache_alias,
             timeout=timeout,
             as_property=as_property,
+            coalesce=coalesce,
+            lock_timeout=lock_timeout,
+            stale_ttl=stale_ttl,
+            early_recompute_beta=early_recompute_beta,
+            batch_window_ms=batch_window_ms,
+            bulk_loader=bulk_loader,
+            serializer=serializer,
         )
         assert tags or prefix, r'Tag(s) or\and prefix must be passed'
         self.tags = tags
         self.prefix = prefix
+        self._lazy_cache_proxy = None
 
         if self._cache_instance:
             self._cache_instance = TaggedCacheProxy(self.cache_instance)
@@ -568,7 +1266,12 @@ class TaggedCached(Cached):
         @property
         def cache_instance(self):
             if self._cache_instance is None:
-                return TaggedCacheProxy(caches[self._cache_alias])
+                cache_instance = caches[self._cache_alias]
+                # proxy is recreated only if cache instance was replaced
+                proxy = self._lazy_cache_proxy
+                if proxy is None or proxy._cache_instance is not cache_instance:
+                    proxy = self._lazy_cache_proxy = TaggedCacheProxy(cache_instance)
+                return proxy
             return self._cache_instance
     else:
         @property
@@ -577,8 +1280,8 @@ class TaggedCached(Cached):
                 self._cache_instance = TaggedCacheProxy(caches[self._cache_alias])
             return self._cache_instance
 
-    def _clone(self, **kwargs):
-        return super(TaggedCached, self)._clone(tags=self.tags, prefix=self.prefix)
+    def _bind(self, instance, klass):
+        return BoundTaggedCached(self, instance, klass)
 
     async def invalidate_cache_by_tags(self, tags=(), *args, **kwargs):
         """ Invalidate cache for this method or property by one of provided tags
@@ -617,7 +1320,17 @@ class TaggedCached(Cached):
             cache_key = create_cache_key(prefix, cache_key)
         return cache_key
 
-    async def set_cached_value(self, cache_key, callable_meta, **extra):
+    def _generate_cache_key_from_arguments(self, args, kwargs):
+        cache_key = super(TaggedCached, self)._generate_cache_key_from_arguments(args, kwargs)
+        if cache_key is None or not self.prefix:
+            return cache_key
+
+        prefix = self._format_from_arguments(self.prefix, args, kwargs)
+        if prefix is None:
+            return None
+        return create_cache_key(prefix, cache_key)
+
+    def _get_tags(self, callable_meta):
         # generate tags and prefix only after successful execution
         tags = self._format(self.tags, callable_meta)
 
@@ -625,8 +1338,16 @@ class TaggedCached(Cached):
             prefix = self._format(self.prefix, callable_meta)
             tags = set(tags) | {prefix}
 
+        return tags
+
+    async def set_cached_value(self, cache_key, callable_meta, **extra):
+        tags = self._get_tags(callable_meta)
         return await super(TaggedCached, self).set_cached_value(cache_key, callable_meta, tags=tags)
 
+    async def set_many_cached_values(self, metas, **extra):
+        tags = {cache_key: self._get_tags(meta) for cache_key, meta in metas.items()}
+        return await super(TaggedCached, self).set_many_cached_values(metas, tags=tags)
+
     def __str__(self):
         return (
             '<TaggedCached: callable="{}", cache_key="{}", tags="{}", prefix="{}", '
@@ -637,3 +1358,47 @@ class TaggedCached(Cached):
                 get_function_path(self.prefix),
                 self.timeout)
         )
+
+
+class BoundCached:
+    """ Cached callable bound to instance or class.
+    Created on every attribute access, so it holds binding only,
+    everything else is taken from shared unbound `Cached` object.
+    """
+
+    __slots__ = ('cached', 'instance', 'klass')
+
+    def __init__(self, cached, instance=None, klass=None):
+        self.cached = cached
+        self.instance = instance
+        self.klass = klass
+
+    def __getattr__(self, item):
+        if item == 'cached':
+            # not initialized yet, e.g. during copying
+            raise AttributeError(item)
+        return getattr(self.cached, item)
+
+    def __call__(self, *args, **kwargs):
+        args, kwargs = self.update_arguments(args, kwargs)
+        return self.cached._call_cached(args, kwargs, self.scope)
+
+    # methods below depend on binding, so they are executed against bound object
+    scope = Cached.scope
+    update_arguments = Cached.update_arguments
+    create_cache_key = Cached.create_cache_key
+    collect_meta = Cached.collect_meta
+    call_many = Cached.call_many
+    invalidate_cache_by_key = Cached.invalidate_cache_by_key
+    refresh_cache = Cached.refresh_cache
+    __str__ = Cached.__str__
+    __repr__ = Cached.__repr__
+
+
+class BoundTaggedCached(BoundCached):
+
+    __slots__ = ()
+
+    invalidate_cache_by_tags = TaggedCached.invalidate_cache_by_tags
+    invalidate_cache_by_prefix = TaggedCached.invalidate_cache_by_prefix
+    __str__ = TaggedCached.__str__
@@ -31,9 +31,30 @@ class ecached(object):
         @cached(callable_with_parameters)
         def func(a, b):  # cache_key = callable_with_parameters(a, b)
 
+        @cached('{a}', coalesce=True)
+        def func(a):  # concurrent misses of the same key call func only once
+
+        @cached('{a}', lock_timeout=5)
+        def func(a):  # the same, but for all processes sharing redis backend
+
+        @cached('{a}', 60, stale_ttl=600)
+        def func(a):  # expired value is served while it's refreshed in background
+
+        @cached('{a}', 60, early_recompute_beta=1.0)
+        def func(a):  # hot value is refreshed in background before it expires
+
+        @cached('{a}', batch_window_ms=0, bulk_loader=load_many)
+        def func(a):  # concurrent calls in one loop iteration are read (and loaded) together
+
+        @cached('{a}', serializer=PickleSerializer())
+        def func(a):  # value is saved to redis with pickle instead of backend serializer
+
     """
     def __init__(self, cache_key=None, timeout=DEFAULT_TIMEOUT, tags=(), prefix=None,
-                 cache_instance=None, cache_alias=None):
+                 cache_instance=None, cache_alias=None, coalesce=False,
+                 lock_timeout=None, stale_ttl=None,
+                 early_recompute_beta=None, batch_window_ms=None, bulk_loader=None,
+                 serializer=None):
         if tags or prefix:
             self.cache = TaggedCached(
                 function=None,
@@ -43,6 +64,13 @@ class ecached(object):
                 prefix=prefix,
                 cache_instance=cache_instance,
                 cache_alias=cache_alias,
+                coalesce=coalesce,
+                lock_timeout=lock_timeout,
+                stale_ttl=stale_ttl,
+                early_recompute_beta=early_recompute_beta,
+                batch_window_ms=batch_window_ms,
+                bulk_loader=bulk_loader,
+                serializer=serializer,
             )
         else:
             self.cache = Cached(
@@ -51,6 +79,13 @@ class ecached(object):
                 timeout=timeout,
                 cache_instance=cache_instance,
                 cache_alias=cache_alias,
+                coalesce=coalesce,
+                lock_timeout=lock_timeout,
+                stale_ttl=stale_ttl,
+                early_recompute_beta=early_recompute_beta,
+                batch_window_ms=batch_window_ms,
+                bulk_loader=bulk_loader,
+                serializer=serializer,
             )
 
         self._instance = None
@@ -99,7 +134,10 @@ class ecached(object):
 
 
 def ecached_property(cache_key=None, timeout=DEFAULT_TIMEOUT, tags=(), prefix=None,
-                     cache_instance=None, cache_alias=None):
+                     cache_instance=None, cache_alias=None, coalesce=False,
+                     lock_timeout=None, stale_ttl=None,
+                     early_recompute_beta=None, batch_window_ms=None, bulk_loader=None,
+                     serializer=None):
     """Works the same as `cached` decorator, but intended to use
     for properties, e.g.:
 
@@ -121,6 +159,13 @@ def ecached_property(cache_key=None, timeout=DEFAULT_TIMEOUT, tags=(), prefix=No
                 cache_instance=cache_instance,
                 cache_alias=cache_alias,
                 as_property=True,
+                coalesce=coalesce,
+                lock_timeout=lock_timeout,
+                stale_ttl=stale_ttl,
+                early_recompute_beta=early_recompute_beta,
+                batch_window_ms=batch_window_ms,
+                bulk_loader=bulk_loader,
+                serializer=serializer,
             )
         else:
             cache = Cached(
@@ -130,6 +175,13 @@ def ecached_property(cache_key=None, timeout=DEFAULT_TIMEOUT, tags=(), prefix=No
                 cache_instance=cache_instance,
                 cache_alias=cache_alias,
                 as_property=True,
+                coalesce=coalesce,
+                lock_timeout=lock_timeout,
+                stale_ttl=stale_ttl,
+                early_recompute_beta=early_recompute_beta,
+                batch_window_ms=batch_window_ms,
+                bulk_loader=bulk_loader,
+                serializer=serializer,
             )
 
         return cache
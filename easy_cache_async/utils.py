@@ -1,6 +1,8 @@
 import inspect
+import re
 from collections import namedtuple
 from inspect import Parameter
+from string import Formatter
 
 
 ArgSpec = namedtuple('ArgSpec', 'args varargs keywords defaults')
@@ -32,6 +34,245 @@ def getargspec(func):
     return ArgSpec(args, varargs, keywords, tuple(defaults))
 
 
+class ArgumentsBinder:
+    """Analyzes function signature once and then binds passed arguments
+    to parameter names much faster than `inspect.getcallargs`.
+    """
+
+    __slots__ = (
+        'function', 'arg_spec', 'positional', 'positions', 'keywords', 'names',
+        'varargs', 'varkw', 'defaults', 'defaults_dict', 'params_count',
+        'default_kwargs_items',
+    )
+
+    def __init__(self, function):
+        self.function = function
+        self.arg_spec = getargspec(function)
+
+        positional = []
+        keywords = set()
+        defaults = []
+
+        for param in inspect.signature(function).parameters.values():  # type: Parameter
+            if param.kind in (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD):
+                positional.append(param.name)
+            if param.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY):
+                keywords.add(param.name)
+            if param.default is not Parameter.empty:
+                defaults.append((param.name, param.default))
+
+        self.positional = tuple(positional)
+        self.positions = {name: index for index, name in enumerate(positional)}
+        self.keywords = frozenset(keywords)
+        # named parameters, without *args and **kwargs
+        self.names = frozenset(self.arg_spec.args)
+        self.varargs = self.arg_spec.varargs
+        self.varkw = self.arg_spec.keywords
+        self.defaults = tuple(defaults)
+        self.defaults_dict = dict(defaults)
+        self.params_count = (
+            len(self.arg_spec.args) + (self.varargs is not None) + (self.varkw is not None)
+        )
+
+        # default keyword arguments depending on number of passed positional arguments
+        self.default_kwargs_items = tuple(
+            self._get_default_kwargs_items(count)
+            for count in range(len(self.arg_spec.args) + 1)
+        )
+
+    def _get_default_kwargs_items(self, args_count):
+        arg_spec = self.arg_spec
+        diff_count = len(arg_spec.args) - args_count
+
+        # do not provide default arguments which were already passed
+        if diff_count > 0 and arg_spec.defaults:
+            # take minimum here
+            diff_count = min(len(arg_spec.defaults), diff_count)
+            return tuple(zip(arg_spec.args[-diff_count:], arg_spec.defaults[-diff_count:]))
+
+        return ()
+
+    def get_default_kwargs(self, args_count):
+        """ :returns: new dict with default values of not passed arguments """
+        if args_count >= len(self.default_kwargs_items):
+            return {}
+        return dict(self.default_kwargs_items[args_count])
+
+    def bind(self, args, kwargs):
+        """ The same as `inspect.getcallargs(function, *args, **kwargs)` """
+        positional = self.positional
+        call_args = dict(zip(positional, args))
+
+        if self.varargs is not None:
+            call_args[self.varargs] = tuple(args[len(positional):])
+        elif len(args) > len(positional):
+            raise TypeError('{}() takes {} positional arguments but {} were given'.format(
+                self.function.__name__, len(positional), len(args)))
+
+        if kwargs:
+            extra_kwargs = {}
+            for name, value in kwargs.items():
+                if name in self.keywords:
+                    if name in call_args:
+                        raise TypeError('{}() got multiple values for argument {!r}'.format(
+                            self.function.__name__, name))
+                    call_args[name] = value
+                elif self.varkw is not None:
+                    extra_kwargs[name] = value
+                else:
+                    raise TypeError('{}() got an unexpected keyword argument {!r}'.format(
+                        self.function.__name__, name))
+
+            if self.varkw is not None:
+                call_args[self.varkw] = extra_kwargs
+        elif self.varkw is not None:
+            call_args[self.varkw] = {}
+
+        if len(call_args) < self.params_count:
+            for name, default in self.defaults:
+                if name not in call_args:
+                    call_args[name] = default
+
+            if len(call_args) < self.params_count:
+                raise TypeError('{}() missing required arguments: {}'.format(
+                    self.function.__name__,
+                    ', '.join(repr(a) for a in self.arg_spec.args if a not in call_args)))
+
+        return call_args
+
+    def is_simple_call(self, args, kwargs):
+        """ Checks if named arguments may be taken from passed
+            arguments directly, without full binding.
+        """
+        if len(args) > len(self.positional):
+            return False
+
+        for name in kwargs:
+            if name not in self.keywords:
+                return False
+
+            index = self.positions.get(name)
+            if index is not None and index < len(args):
+                return False
+
+        return True
+
+    def get_argument(self, name, args, kwargs):
+        """ Gets value of named argument, `is_simple_call` must be checked before.
+            :raises KeyError: if argument is not passed and has no default value
+        """
+        index = self.positions.get(name)
+        if index is not None and index < len(args):
+            return args[index]
+
+        if name in kwargs:
+            return kwargs[name]
+
+        return self.defaults_dict[name]
+
+
+_CONVERTERS = {'s': str, 'r': repr, 'a': ascii}
+
+# argument name followed by attributes and items, e.g. "a.b[0]"
+_FIELD_NAME_RE = re.compile(r'([^.[\]]+)((?:\.[^.[\]]+|\[[^\]]+\])*)\Z')
+_FIELD_CHAIN_RE = re.compile(r'\.([^.[\]]+)|\[([^\]]+)\]')
+
+
+def _split_field_name(field_name):
+    """ Parses field name of format string the same way as `str.format`
+        :returns: tuple (argument name, tuple of (is attribute, name or index) pairs)
+        or None if field isn't a plain named one
+    """
+    match = _FIELD_NAME_RE.match(field_name)
+    if match is None or match.group(1).isdecimal():
+        return None
+
+    chain = []
+    for attribute, key in _FIELD_CHAIN_RE.findall(match.group(2)):
+        if attribute:
+            chain.append((True, attribute))
+        else:
+            # numeric keys are indexes, as in str.format
+            chain.append((False, int(key) if key.isdecimal() else key))
+    return match.group(1), tuple(chain)
+
+
+class CompiledTemplate:
+    """String template parsed once, formats values the same way as
+    `template.format(**call_args)` without parsing the string on every call.
+    """
+
+    __slots__ = ('template', 'parts', 'names')
+
+    def __init__(self, template, parts):
+        self.template = template
+        # tuple of (literal text, field) pairs, where field is
+        # (argument name, attributes/items chain, converter, format spec) or None
+        self.parts = parts
+        # argument names used in template
+        self.names = frozenset(field[0] for _, field in parts if field)
+
+    @classmethod
+    def compile(cls, template):
+        """ :returns: CompiledTemplate or None if template is not supported """
+        parts = []
+
+        try:
+            parsed = list(Formatter().parse(template))
+        except ValueError:
+            # invalid template, let str.format raise a proper error
+            return None
+
+        for literal, field_name, format_spec, conversion in parsed:
+            if field_name is None:
+                parts.append((literal, None))
+                continue
+
+            field = _split_field_name(field_name)
+
+            # positional fields, unusual names and nested format specs are left for str.format
+            if field is None or '{' in format_spec:
+                return None
+
+            first, chain = field
+            converter = _CONVERTERS[conversion] if conversion else None
+            parts.append((literal, (first, chain, converter, format_spec)))
+
+        return cls(template, tuple(parts))
+
+    @staticmethod
+    def _format_field(value, chain, converter, format_spec):
+        for is_attr, key in chain:
+            value = getattr(value, key) if is_attr else value[key]
+
+        if converter is not None:
+            value = converter(value)
+        return format(value, format_spec)
+
+    def format(self, call_args):
+        """ :raises KeyError: if required argument is absent """
+        result = []
+        for literal, field in self.parts:
+            result.append(literal)
+            if field is not None:
+                name, chain, converter, format_spec = field
+                result.append(self._format_field(call_args[name], chain, converter, format_spec))
+        return ''.join(result)
+
+    def format_arguments(self, binder, args, kwargs):
+        """ The same as `format`, but takes values from passed arguments directly
+            :type binder: ArgumentsBinder
+        """
+        result = []
+        for literal, field in self.parts:
+            result.append(literal)
+            if field is not None:
+                name, chain, converter, format_spec = field
+                value = binder.get_argument(name, args, kwargs)
+                result.append(self._format_field(value, chain, converter, format_spec))
+        return ''.join(result)
+
+
 def force_text(obj, encoding='utf-8'):
     if isinstance(obj, str):
         return obj
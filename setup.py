@@ -34,6 +34,8 @@ tests_require = [
     'pytest-asyncio',
     'cachetools',
     'aioredis',
+    'fakeredis[aioredis,lua]',
+    'msgpack',
     'tox',
 ]
 
@@ -71,5 +73,6 @@ setup(
         'tests': tests_require,
         'locmem': ['cachetools'],
         'redis': ['aioredis'],
+        'msgpack': ['msgpack'],
     },
 )
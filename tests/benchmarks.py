@@ -1,15 +1,28 @@
 import asyncio
+import inspect
 import math
+import os
 import sys
+import tracemalloc
 from contextlib import contextmanager
+from random import Random
 from timeit import default_timer
 
 import aioredis
-from cachetools import LRUCache
+from cachetools import Cache, LRUCache
 
 from easy_cache_async import caches
 from easy_cache_async.contrib import LocMemCacheBackend, RedisCacheBackend
+from easy_cache_async.contrib.memory_store import MemoryStore
+from easy_cache_async.contrib.serializers import (
+    JsonSerializer,
+    MarshalSerializer,
+    MsgpackSerializer,
+    PickleSerializer,
+    msgpack,
+)
 from easy_cache_async.decorators import ecached
+from easy_cache_async.utils import ArgumentsBinder, getargspec
 from tests.conftest import REDIS_CONNECTION
 
 
@@ -108,6 +121,183 @@ async def test_redis_cache_tags():
     return time_consuming_operation()
 
 
+@ecached('hit:{a}:{b}', cache_alias='locmem')
+async def test_locmem_hit(a, b, c=10, d='d'):
+    return time_consuming_operation()
+
+
+class HitUser:
+    id = 1
+
+    @ecached('hit:user:{self.id}:{a}', cache_alias='locmem')
+    async def test_locmem_method_hit(self, a):
+        return time_consuming_operation()
+
+    @ecached('hit:tagged_user:{self.id}:{a}', cache_alias='locmem', tags=['user'])
+    async def test_locmem_tagged_method_hit(self, a):
+        return time_consuming_operation()
+
+
+def measure_allocations(function, calls=1000):
+    """ :returns: number of bytes allocated per call and still referenced """
+    objects = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(calls):
+        objects.append(function())
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated / calls
+
+
+def legacy_bind(function, args, kwargs):
+    """Arguments binding performed on every call before ArgumentsBinder was introduced"""
+    getargspec(function)
+    return inspect.getcallargs(function, *args, **kwargs)
+
+
+def run_laps(name, function, laps=100, calls_per_lap=1000):
+    sw = Stopwatch(name)
+    for _ in range(laps):
+        with sw.timing():
+            for _ in range(calls_per_lap):
+                function()
+    print(sw)
+    return sw
+
+
+async def run_async_laps(name, function, laps=100, calls_per_lap=1000):
+    sw = Stopwatch(name)
+    for _ in range(laps):
+        with sw.timing():
+            for _ in range(calls_per_lap):
+                await function()
+    print(sw)
+    return sw
+
+
+async def hit_path_benchmarks():
+    print('======= hit path, time per 1000 calls =======')
+
+    function = test_locmem_hit.function
+    binder = ArgumentsBinder(function)
+    args, kwargs = (1, 2), {'d': 'e'}
+
+    sw1 = run_laps('[ legacy] getargspec+getcallargs', lambda: legacy_bind(function, args, kwargs))
+    sw2 = run_laps('[  fresh] ArgumentsBinder.bind', lambda: binder.bind(args, kwargs))
+    print('bind mean diff: {:.3} %'.format(float(sw2.mean()) / sw1.mean() * 100))
+
+    await test_locmem_hit(1, 2, d='e')
+    await run_async_laps('[    hit] ' + test_locmem_hit.__name__, lambda: test_locmem_hit(1, 2, d='e'))
+
+    user = HitUser()
+    for name in ('test_locmem_method_hit', 'test_locmem_tagged_method_hit'):
+        await getattr(user, name)(1)
+        run_laps('[ access] ' + name, lambda: getattr(user, name))
+        print('bound access allocates {:.0f} bytes'.format(
+            measure_allocations(lambda: getattr(user, name))))
+        await run_async_laps('[    hit] ' + name, lambda: getattr(user, name)(1))
+
+
+def serializer_benchmarks():
+    print('======= serializers, time per 1000 calls =======')
+
+    payload = {
+        'users': [
+            {'id': i, 'name': 'user_{}'.format(i), 'rating': i / 3, 'active': bool(i % 2),
+             'tags': ['tag{}'.format(j) for j in range(5)], 'profile': {'age': 20 + i, 'city': None}}
+            for i in range(100)
+        ],
+        'total': 100,
+    }
+
+    serializers = [JsonSerializer(), PickleSerializer(), MarshalSerializer()]
+    if msgpack is not None:
+        serializers.append(MsgpackSerializer())
+
+    for serializer in serializers:
+        name = serializer.__class__.__name__
+        data = serializer.dump_value(payload)
+        run_laps('[  dumps] ' + name, lambda: serializer.dump_value(payload), laps=10)
+        run_laps('[  loads] ' + name, lambda: serializer.load_value(data), laps=10)
+        print('{} size: {} bytes'.format(name, len(data)))
+
+
+async def locmem_benchmarks(size=1000000, batch=100):
+    print('======= locmem backend, {} entries, ops/sec ======='.format(size))
+
+    keys = ['key:{}'.format(i) for i in range(size)]
+
+    async def run_ops(name, operation, count):
+        t0 = default_timer()
+        await operation()
+        print('{:<37}: {:,.0f}'.format(name, count / (default_timer() - t0)))
+
+    for client in (Cache(maxsize=size), MemoryStore(maxsize=size)):
+        cache_instance = LocMemCacheBackend(client)
+        client_name = client.__class__.__name__
+
+        async def set_all():
+            for key in keys:
+                await cache_instance.set(key, key, 600)
+
+        async def get_all():
+            for key in keys:
+                await cache_instance.get(key)
+
+        async def get_many_all():
+            for i in range(0, size, batch):
+                await cache_instance.get_many(keys[i:i + batch])
+
+        async def set_many_all():
+            for i in range(0, size, batch):
+                await cache_instance.set_many(dict.fromkeys(keys[i:i + batch], 1), 600)
+
+        await run_ops('[     set] {}'.format(client_name), set_all, size)
+        await run_ops('[     get] {}'.format(client_name), get_all, size)
+        await run_ops('[get_many] {}'.format(client_name), get_many_all, size)
+        await run_ops('[set_many] {}'.format(client_name), set_many_all, size)
+
+
+def load_trace(path):
+    """ Recorded keys access log, the first column of every line is a key """
+    with open(path) as trace_file:
+        return [line.split()[0] for line in trace_file if line.strip()]
+
+
+def synthetic_trace(keys_count=10000, length=200000, scan_every=20000, scan_length=5000, seed=0):
+    """ Skewed accesses to `keys_count` keys interrupted by scans of one-off keys, e.g. batch jobs """
+    random = Random(seed)
+    trace = []
+    scans = 0
+
+    for i in range(length):
+        if i and i % scan_every == 0:
+            trace.extend('scan:{}:{}'.format(scans, j) for j in range(scan_length))
+            scans += 1
+        trace.append('key:{}'.format(int(keys_count * random.random() ** 3)))
+    return trace
+
+
+def policies_benchmarks(trace_path=None, capacity=1000):
+    trace = load_trace(trace_path) if trace_path else synthetic_trace()
+    print('======= eviction policies, {} accesses, capacity {}, hit ratio ======='.format(len(trace), capacity))
+
+    for policy in ('lru', 'tinylfu', 'arc'):
+        store = MemoryStore(maxsize=capacity, policy=policy)
+        hits = 0
+
+        t0 = default_timer()
+        for key in trace:
+            if store.get(key) is None:
+                store[key] = True
+            else:
+                hits += 1
+        ops = len(trace) / (default_timer() - t0)
+
+        print('{:<37}: {:.2%} ({:,.0f} ops/sec)'.format(policy, hits / len(trace), ops))
+
+
 async def main():
     await setup()
 
@@ -162,6 +352,12 @@ async def main():
             float(sw2.median()) / sw1.median() * 100,
         ))
 
+    await hit_path_benchmarks()
+    serializer_benchmarks()
+    await locmem_benchmarks()
+    # path to recorded keys access log, synthetic trace is used by default
+    policies_benchmarks(os.environ.get('EASY_CACHE_ASYNC_TRACE'))
+
 
 if __name__ == '__main__':
     loop = asyncio.get_event_loop()
@@ -35,6 +35,31 @@ async def create_locmem_lru(event_loop, request, **kwargs):
     )
 
 
+async def create_locmem_store(event_loop, request, **kwargs):
+    from .proxies import LocMemCacheProxy
+    from easy_cache_async.contrib.memory_store import MemoryStore
+
+    return await LocMemCacheProxy.create(
+        cache_class=MemoryStore, cache_options=dict(maxsize=10), **kwargs
+    )
+
+
+async def create_shared_memory(event_loop, request, **kwargs):
+    import tempfile
+    from .proxies import SharedMemoryCacheProxy
+
+    # empty file is initialized by the table
+    fd, path = tempfile.mkstemp(prefix='easy-cache-async-')
+    os.close(fd)
+    proxy = await SharedMemoryCacheProxy.create(path, table_options=dict(buckets=64), **kwargs)
+
+    def teardown():
+        proxy.cache_instance.client.close()
+        os.unlink(path)
+    request.addfinalizer(teardown)
+    return proxy
+
+
 async def create_redis(event_loop, request, **kwargs):
     from .proxies import RedisCacheProxy
     redis_proxy = await RedisCacheProxy.create(**kwargs)
@@ -46,16 +71,34 @@ async def create_redis(event_loop, request, **kwargs):
     return redis_proxy
 
 
+async def create_fake_redis(event_loop, request, **kwargs):
+    from .proxies import FakeRedisCacheProxy
+    redis_proxy = await FakeRedisCacheProxy.create(**kwargs)
+
+    def teardown_redis():
+        # QUIT command is not supported by emulation
+        redis_proxy.cache_instance.client.close()
+        event_loop.run_until_complete(redis_proxy.cache_instance.client.wait_closed())
+    request.addfinalizer(teardown_redis)
+    return redis_proxy
+
+
 @pytest.fixture(
     params=[
         create_locmem,
         create_locmem_lru,
+        create_locmem_store,
+        create_shared_memory,
         create_redis,
+        create_fake_redis,
     ],
     ids=[
         'locmem',
         'locmem_lru',
+        'locmem_store',
+        'shared_memory',
         'redis',
+        'fake_redis',
     ],
 )
 def cache_proxy(event_loop, request):
@@ -34,6 +34,30 @@ class LocMemCacheProxy(AbstractCacheInstanceProxy):
         return cls(LocMemCacheBackend(cache_class(**cache_options), **kwargs))
 
 
+class SharedMemoryCacheProxy(AbstractCacheInstanceProxy):
+
+    async def get_timeout(self, key):
+        ttl = self.client.ttl(self.cache_instance.encode_key(self.make_key(key)))
+        return None if ttl is None else round(ttl)
+
+    async def clear(self):
+        self.cache_instance.client.clear()
+
+    async def contains(self, key) -> bool:
+        return self.client.get(self.cache_instance.encode_key(key)) is not None
+
+    async def get_all_keys(self) -> typing.Sequence:
+        return [force_text(key) for key, _ in self.cache_instance.client.items()]
+
+    @classmethod
+    async def create(cls, path, table_options=None, **kwargs):
+        # fcntl is unavailable on Windows, so module is imported only when it's used
+        from easy_cache_async.contrib.shared_memory import SharedMemoryCacheBackend, SharedMemoryTable
+
+        table = SharedMemoryTable(path, **(table_options or {}))
+        return cls(SharedMemoryCacheBackend(table, **kwargs))
+
+
 class RedisCacheProxy(AbstractCacheInstanceProxy):
 
     async def get_all_keys(self) -> typing.Sequence:
@@ -57,3 +81,13 @@ class RedisCacheProxy(AbstractCacheInstanceProxy):
         from .conftest import REDIS_CONNECTION
         redis = await aioredis.create_redis(REDIS_CONNECTION)
         return cls(cache_instance=RedisCacheBackend(redis, **kwargs))
+
+
+class FakeRedisCacheProxy(RedisCacheProxy):
+    """Redis proxy working with in-process redis emulation, no live instance required"""
+
+    @classmethod
+    async def create(cls, server=None, **kwargs):
+        from fakeredis import aioredis as fake_aioredis
+        redis = await fake_aioredis.create_redis(server=server)
+        return cls(cache_instance=RedisCacheBackend(redis, **kwargs))
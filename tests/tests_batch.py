@@ -0,0 +1,201 @@
+import asyncio
+from unittest.mock import call, patch
+
+import pytest
+
+from easy_cache_async import ecached
+
+from .tools import BaseTest, CacheMock
+
+
+cache_mock = CacheMock()
+
+
+@ecached('batch:{a}', 100)
+async def batch_func(a, b=1):
+    return cache_mock.trigger_result(a, b)
+
+
+@ecached('batch_tagged:{a}', 100, tags=['batch:{a}'], prefix='batch_prefix')
+async def batch_tagged_func(a):
+    return cache_mock.trigger_result(a)
+
+
+@ecached('batch_none:{a}', 100)
+async def batch_none_func(a):
+    cache_mock(a)
+
+
+@ecached('batch_none_tagged:{a}', 100, tags=['batch_none'])
+async def batch_none_tagged_func(a):
+    cache_mock(a)
+
+
+async def bulk_loader(metas):
+    return [cache_mock.trigger_result('bulk', meta['a']) for meta in metas]
+
+
+class BatchUser:
+    id = 1
+
+    @ecached('batch_user:{self.id}:{a}')
+    def get_item(self, a):
+        return cache_mock.trigger_result(self.id, a)
+
+
+@pytest.mark.usefixtures('setup')
+@pytest.mark.asyncio
+class TestCallMany(BaseTest):
+
+    @staticmethod
+    def get_cache_mock() -> CacheMock:
+        return cache_mock
+
+    async def test_call_many(self):
+        cache_instance = self.local_cache.cache_instance
+        results = [self.cache_mock.create_args(a, 1) for a in (1, 2, 1, 3)]
+
+        with patch.object(cache_instance, 'get_many', wraps=cache_instance.get_many) as get_many, \
+                patch.object(cache_instance, 'set_many', wraps=cache_instance.set_many) as set_many:
+            assert await batch_func.call_many([1, 2, (1, ), {'a': 3}]) == results
+
+            # duplicates are called only once
+            assert self.cache_mock.call_args_list == [call(results[0]), call(results[1]), call(results[3])]
+            get_many.assert_called_once()
+            set_many.assert_called_once()
+            self.cache_mock.reset_mock()
+
+            # cached version
+            assert await batch_func.call_many([1, 2, 3]) == [results[0], results[1], results[3]]
+            self.cache_mock.assert_not_called()
+            assert get_many.call_count == 2
+            set_many.assert_called_once()
+
+        await self._check_timeout('batch:2', 100)
+
+        # the same cache is used by ordinary calls
+        assert await batch_func(2) == results[1]
+        self.cache_mock.assert_not_called()
+
+    async def test_call_many_bulk_loader(self):
+        await batch_func(1)
+        self.cache_mock.reset_mock()
+
+        assert await batch_func.call_many([1, 2, 3], bulk_loader=bulk_loader) == [
+            self.cache_mock.create_args(1, 1),
+            self.cache_mock.create_args('bulk', 2),
+            self.cache_mock.create_args('bulk', 3),
+        ]
+        assert self.cache_mock.call_count == 2
+
+    async def test_call_many_tagged(self):
+        results = [self.cache_mock.create_args(a) for a in (1, 2, 3)]
+        assert await batch_tagged_func.call_many([1, 2, 3]) == results
+        self.cache_mock.reset_mock()
+
+        assert await batch_tagged_func.call_many([1, 2, 3]) == results
+        self.cache_mock.assert_not_called()
+
+        # only invalidated value is recalculated
+        await batch_tagged_func.invalidate_cache_by_tags('batch:{a}', a=2)
+        assert await batch_tagged_func.call_many([1, 2, 3]) == results
+        self.cache_mock.assert_called_once_with(results[1])
+        self.cache_mock.reset_mock()
+
+        await batch_tagged_func.invalidate_cache_by_prefix()
+        assert await batch_tagged_func.call_many([1, 2, 3]) == results
+        assert self.cache_mock.call_count == 3
+
+    async def test_call_many_error(self):
+        with pytest.raises(ValueError):
+            await batch_window_error_func.call_many([2, 1, 3])
+
+        # values of successful calls are saved
+        assert await batch_window_error_func.call_many([2]) == [self.cache_mock.create_args(2)]
+        self.cache_mock.assert_called_once_with(self.cache_mock.create_args(2))
+
+    async def test_call_many_none(self):
+        # cached None is a hit
+        for func in (batch_none_func, batch_none_tagged_func):
+            assert await func.call_many([1, 2]) == [None, None]
+            assert await func.call_many([1, 2]) == [None, None]
+            assert self.cache_mock.call_args_list == [call(1), call(2)]
+            self.cache_mock.reset_mock()
+
+    async def test_call_many_method(self):
+        user = BatchUser()
+        results = [self.cache_mock.create_args(user.id, a) for a in (1, 2)]
+
+        assert await user.get_item.call_many([1, 2]) == results
+        assert await user.get_item(2) == results[1]
+        assert self.cache_mock.call_count == 2
+
+
+@ecached('batch_window:{a}', 100, batch_window_ms=0)
+async def batch_window_func(a):
+    return cache_mock.trigger_result(a)
+
+
+@ecached('batch_window_loader:{a}', 100, tags=['batch'], batch_window_ms=10, bulk_loader=bulk_loader)
+async def batch_window_loader_func(a):
+    return cache_mock.trigger_result(a)
+
+
+@ecached('batch_window_error:{a}', batch_window_ms=0)
+async def batch_window_error_func(a):
+    if a % 2:
+        raise ValueError(a)
+    return cache_mock.trigger_result(a)
+
+
+@pytest.mark.usefixtures('setup')
+@pytest.mark.asyncio
+class TestBatchWindow(BaseTest):
+
+    @staticmethod
+    def get_cache_mock() -> CacheMock:
+        return cache_mock
+
+    async def test_batch_window(self):
+        cache_instance = self.local_cache.cache_instance
+        batch_window_func.stats.clear()
+        results = [self.cache_mock.create_args(a) for a in (1, 2, 3, 1)]
+
+        with patch.object(cache_instance, 'get_many', wraps=cache_instance.get_many) as get_many:
+            assert await asyncio.gather(*[batch_window_func(a) for a in (1, 2, 3, 1)]) == results
+            get_many.assert_called_once()
+
+        assert self.cache_mock.call_count == 3
+        assert batch_window_func.stats['batches'] == 1
+        self.cache_mock.reset_mock()
+
+        # cached version
+        assert await batch_window_func(2) == results[1]
+        self.cache_mock.assert_not_called()
+
+    async def test_batch_window_bulk_loader(self):
+        results = [self.cache_mock.create_args('bulk', a) for a in (1, 2)]
+
+        assert await asyncio.gather(batch_window_loader_func(1), batch_window_loader_func(2)) == results
+        assert await batch_window_loader_func(2) == results[1]
+        assert self.cache_mock.call_count == 2
+
+    async def test_batch_window_error(self):
+        results = await asyncio.gather(
+            batch_window_error_func(1), batch_window_error_func(2), return_exceptions=True
+        )
+        # only failed call gets exception
+        assert isinstance(results[0], ValueError)
+        assert results[1] == self.cache_mock.create_args(2)
+        assert not batch_window_error_func._batch
+        assert not batch_window_error_func._batches
+
+        # successful result is cached
+        assert await batch_window_error_func(2) == results[1]
+        self.cache_mock.assert_called_once_with(results[1])
+
+    async def test_batch_window_options(self):
+        with pytest.raises(ValueError):
+            ecached('key', batch_window_ms=0, coalesce=True)(bulk_loader)
+        with pytest.raises(ValueError):
+            ecached('key', batch_window_ms=0, lock_timeout=10)(bulk_loader)
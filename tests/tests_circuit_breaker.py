@@ -0,0 +1,170 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from cachetools import Cache
+
+from easy_cache_async import caches, ecached
+from easy_cache_async.contrib import LocMemCacheBackend
+from easy_cache_async.contrib.circuit_breaker import CLOSED, OPEN, CircuitBreakerBackend
+from easy_cache_async.core import NOT_FOUND, TaggedCacheProxy
+
+from .tools import AsyncMock, CacheMock
+
+
+cache_mock = CacheMock()
+BREAKER_CACHE_ALIAS = 'circuit-breaker'
+
+
+@ecached('breaker:{a}', 100, cache_alias=BREAKER_CACHE_ALIAS)
+async def breaker_func(a):
+    return cache_mock.trigger_result(a)
+
+
+@ecached('breaker_locked:{a}', cache_alias=BREAKER_CACHE_ALIAS, lock_timeout=10)
+async def breaker_locked_func(a):
+    return cache_mock.trigger_result(a)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+class TestCircuitBreakerBackend:
+
+    # noinspection PyAttributeOutsideInit
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.cache_mock = cache_mock
+        self.cache_mock.reset_mock()
+        self.backend = LocMemCacheBackend(Cache(maxsize=100))
+        self.breaker = CircuitBreakerBackend(self.backend, min_calls=4, window_size=4, reset_timeout=10)
+        caches[BREAKER_CACHE_ALIAS] = self.breaker
+
+        self.clock = Clock()
+        with patch('easy_cache_async.contrib.circuit_breaker.monotonic', self.clock):
+            yield
+
+    async def test_closed(self):
+        assert await breaker_func(1) == self.cache_mock.create_args(1)
+        assert await breaker_func(1) == self.cache_mock.create_args(1)
+        self.cache_mock.assert_called_once_with('1')
+
+        assert self.breaker.state == CLOSED
+        assert self.breaker.failure_rate == 0
+        assert not self.breaker.stats
+
+        # attributes of wrapped backend are available
+        assert self.breaker.prefix is None
+        assert TaggedCacheProxy(self.breaker)._tagged_values
+
+    async def test_open(self):
+        result = self.cache_mock.create_args(1)
+
+        with patch.object(self.backend, 'get', side_effect=ConnectionError) as get, \
+                patch.object(self.backend, 'set', side_effect=ConnectionError):
+            # failures are not raised
+            assert await breaker_func(1) == result
+            assert await breaker_func(1) == result
+            assert self.breaker.state == OPEN
+            assert self.breaker.stats['failures'] == 4
+            assert self.breaker.stats['opened'] == 1
+            assert get.call_count == 2
+
+            # cache is bypassed
+            assert await breaker_func(1) == result
+            assert get.call_count == 2
+            assert self.breaker.stats['short_circuited'] == 2
+
+        assert self.cache_mock.call_count == 3
+        assert await self.breaker.get('key') is NOT_FOUND
+        assert await self.breaker.get_many(['key']) == {'key': None}
+        assert await self.breaker.set('key', 1) is None
+
+    async def _open(self):
+        with patch.object(self.backend, 'get', side_effect=ConnectionError):
+            for _ in range(4):
+                assert await self.breaker.get('key1') is NOT_FOUND
+        assert self.breaker.state == OPEN
+
+    async def test_half_open(self):
+        await self.backend.set('key1', 'value1')
+        await self._open()
+
+        # failed probe opens circuit again
+        self.clock.now += 10
+        with patch.object(self.backend, 'get', side_effect=ConnectionError):
+            assert await self.breaker.get('key1') is NOT_FOUND
+        assert self.breaker.state == OPEN
+        assert await self.breaker.get('key1') is NOT_FOUND
+
+        # only one probe is made at once
+        self.clock.now += 10
+
+        async def slow_get(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return 'value1'
+
+        with patch.object(self.backend, 'get', slow_get):
+            assert await asyncio.gather(self.breaker.get('key1'), self.breaker.get('key1')) == [
+                'value1', NOT_FOUND,
+            ]
+
+        assert self.breaker.state == CLOSED
+        assert await self.breaker.get('key1') == 'value1'
+        assert self.breaker.stats['opened'] == 2
+
+    async def test_slow_calls(self):
+        self.breaker.slow_call_duration = 0.5
+
+        async def slow_get(*args, **kwargs):
+            self.clock.now += 1
+            return 'value1'
+
+        with patch.object(self.backend, 'get', slow_get):
+            for _ in range(4):
+                assert await self.breaker.get('key1') == 'value1'
+
+        assert self.breaker.stats['slow_calls'] == 4
+        assert self.breaker.state == OPEN
+
+    async def test_locks(self):
+        # backend without locks
+        assert await breaker_locked_func(1) == self.cache_mock.create_args(1)
+        self.cache_mock.assert_called_once_with('1')
+
+        # lock held by someone else is not waited for while circuit is open
+        self.backend.acquire_lock = AsyncMock(return_value=None)
+        self.backend.release_lock = AsyncMock()
+        await self._open()
+
+        assert await breaker_locked_func(2) == self.cache_mock.create_args(2)
+        self.backend.acquire_lock.assert_not_called()
+        self.backend.release_lock.assert_not_called()
+
+        self.breaker.reset()
+        assert await self.breaker.acquire_lock('lock', 10) is None
+
+    async def test_reset(self):
+        await self.backend.set('key1', 'value1')
+        await self._open()
+
+        self.breaker.reset()
+        assert self.breaker.state == CLOSED
+        assert self.breaker.failure_rate == 0
+        assert await self.breaker.get('key1') == 'value1'
+
+    async def test_cancelled(self):
+        # cancellation is raised and isn't counted as failure
+        with patch.object(self.backend, 'get', side_effect=asyncio.CancelledError):
+            with pytest.raises(asyncio.CancelledError):
+                await self.breaker.get('key1')
+
+        assert not self.breaker.stats
+        assert self.breaker.failure_rate == 0
@@ -1,9 +1,11 @@
+import asyncio
 from collections import OrderedDict
 from functools import partial
+from time import monotonic
 
 import pytest
 import random
-from unittest.mock import call, Mock
+from unittest.mock import call, patch, Mock
 
 from easy_cache_async import (
     ecached,
@@ -12,11 +14,36 @@ from easy_cache_async import (
     meta_accepted,
 )
 from easy_cache_async import MetaCallable
+from easy_cache_async.contrib import RedisCacheBackend, RedisPoolCacheBackend
 from easy_cache_async.contrib.dummy import DummyCacheInstance
-from easy_cache_async.core import NOT_FOUND, create_cache_key
+from easy_cache_async.contrib.serializers import (
+    TAGGED_VALUE_HEADER,
+    JsonSerializer,
+    LegacySerializer,
+    LzmaCompressor,
+    MarshalSerializer,
+    MsgpackSerializer,
+    PickleSerializer,
+    ZlibCompressor,
+    load_tagged_value,
+    load_value,
+    msgpack,
+)
+from easy_cache_async.core import (
+    BYPASS_LOCK_TOKEN,
+    NOT_FOUND,
+    ImproperlyConfigured,
+    TaggedCacheProxy,
+    TaggedValue,
+    create_cache_key,
+    create_tag_cache_key,
+    get_timestamp,
+)
 
 from .tools import CacheMock, AsyncMock
-from .conftest import create_locmem, create_locmem_lru, create_redis
+from .conftest import (
+    create_fake_redis, create_locmem, create_locmem_lru, create_locmem_store, create_redis, create_shared_memory,
+)
 
 cache_mock = CacheMock()
 
@@ -135,12 +162,18 @@ class TestDummyCacheInstance:
     params=[
         create_locmem,
         create_locmem_lru,
+        create_locmem_store,
+        create_shared_memory,
         create_redis,
+        create_fake_redis,
     ],
     ids=[
         'locmem',
         'locmem_lru',
+        'locmem_store',
+        'shared_memory',
         'redis',
+        'fake_redis',
     ],
 )
 def cache_instance_factory(event_loop, request):
@@ -167,6 +200,49 @@ class TestBaseInstanceInterface:
         await cache_instance.set('key3', 'value3', timeout=local_timeout)
         assert await cache_instance.get_timeout('key3') == local_timeout
 
+    async def test_set_many_timeouts(self, cache_instance_factory):
+        cache_instance = await cache_instance_factory(timeout=10)
+        await cache_instance.set_many(
+            {'key1': 'value1', 'key2': 'value2', 'key3': 'value3'}, 20, timeouts={'key2': 30, 'key3': 0}
+        )
+
+        assert await cache_instance.get_many(['key1', 'key2', 'key3']) == {
+            'key1': 'value1', 'key2': 'value2', 'key3': 'value3',
+        }
+        assert await cache_instance.get_timeout('key1') == 20
+        assert await cache_instance.get_timeout('key2') == 30
+        assert not await cache_instance.get_timeout('key3')
+
+    async def test_tags_timeout(self, cache_instance_factory):
+        cache_instance = await cache_instance_factory(tags_timeout=100)
+        tagged_cache = TaggedCacheProxy(cache_instance.cache_instance)
+
+        await tagged_cache.set('key1', 'value1', 10, tags=['tag1'])
+        assert await cache_instance.get_timeout('key1') == 10
+        assert await cache_instance.get_timeout(create_tag_cache_key('tag1')) == 100
+
+        await tagged_cache.invalidate(['tag2'])
+        assert await cache_instance.get_timeout(create_tag_cache_key('tag2')) == 100
+
+    async def test_locmem_expiration(self):
+        cache_instance = (await create_locmem(None, None)).cache_instance
+        now = monotonic()
+
+        with patch('easy_cache_async.contrib.locmem_cache.monotonic', return_value=now):
+            await cache_instance.set('key1', 'value1', 10)
+            await cache_instance.set_many({'key2': 'value2', 'key3': 'value3'}, 20, timeouts={'key3': 0})
+
+        assert cache_instance.client['key1'].deadline == now + 10
+        assert cache_instance.client['key3'].deadline is None
+
+        with patch('easy_cache_async.contrib.locmem_cache.monotonic', return_value=now + 15):
+            assert await cache_instance.get_many(['key1', 'key2', 'key3']) == {
+                'key1': None, 'key2': 'value2', 'key3': 'value3',
+            }
+
+        # expired value is removed
+        assert 'key1' not in cache_instance.client
+
     async def test_prefix(self, cache_instance_factory):
         simple_prefix = 'project1'
         cache_instance = await cache_instance_factory(prefix=simple_prefix)
@@ -219,3 +295,371 @@ class TestBaseInstanceInterface:
             ==
             sorted(keys)
         )
+
+    async def test_tag_versions(self, cache_instance_factory):
+        # redis tagged reads don't need local tags versions at all
+        cache_instance = (
+            await cache_instance_factory(tag_versions_ttl=10, tagged_reads=False)
+        ).cache_instance
+        tagged_cache = TaggedCacheProxy(cache_instance)
+        await tagged_cache.set('key1', 'value1', tags=['tag1', 'tag2'])
+
+        with patch.object(cache_instance, 'get_many', wraps=cache_instance.get_many) as get_many:
+            # tags versions are known locally
+            for _ in range(3):
+                assert await tagged_cache.get('key1') == 'value1'
+            get_many.assert_not_called()
+
+            # local invalidation is visible immediately
+            await TaggedCacheProxy(cache_instance).invalidate(['tag1'])
+            assert await tagged_cache.get('key1') is None
+
+            # forgotten versions are read from backend again
+            await tagged_cache.set('key1', 'value2', tags=['tag1', 'tag2'])
+            get_many.reset_mock()
+            cache_instance.tag_versions.clear()
+            assert await tagged_cache.get('key1') == 'value2'
+            assert await tagged_cache.get('key1') == 'value2'
+            get_many.assert_called_once()
+
+        assert cache_instance.tag_versions.stats['hits'] == 5
+
+
+@pytest.fixture(
+    params=[create_redis, create_fake_redis],
+    ids=['redis', 'fake_redis'],
+)
+def redis_instance_factory(event_loop, request):
+    return partial(request.param, event_loop, request)
+
+
+@pytest.mark.asyncio
+class TestRedisTaggedReads:
+
+    async def _check_tagged_reads(self, cache_instance):
+        tagged_cache = TaggedCacheProxy(cache_instance)
+        await tagged_cache.set('key1', {'a': 'b'}, tags=['tag1', 'tag:"2"'])
+        await tagged_cache.set('key2', 'value2', tags=['tag1'])
+
+        with patch.object(cache_instance, 'get_many', wraps=cache_instance.get_many) as get_many:
+            # validated by redis
+            assert await tagged_cache.get('key2') == 'value2'
+            get_many.assert_not_called()
+
+            if cache_instance.tagged_values:
+                assert await tagged_cache.get('key1') == {'a': 'b'}
+                get_many.assert_not_called()
+            else:
+                # unusual tag in JSON is validated by client
+                assert await tagged_cache.get('key1') == {'a': 'b'}
+                get_many.assert_called_once()
+            get_many.reset_mock()
+
+            # outdated values are not returned by script
+            await tagged_cache.invalidate(['tag1'])
+            assert await tagged_cache.get('key1') is None
+            assert await tagged_cache.get('key2') is None
+            assert await tagged_cache.get('key3') is None
+            get_many.assert_not_called()
+
+    async def test_tagged_reads(self, redis_instance_factory):
+        cache_instance = (await redis_instance_factory(prefix='tagged', tagged_values=True)).cache_instance
+        await self._check_tagged_reads(cache_instance)
+
+        # script is reloaded
+        await cache_instance.client.script_flush()
+        await self._check_tagged_reads(cache_instance)
+
+    async def test_tagged_reads_legacy_values(self, redis_instance_factory):
+        # values are saved as JSON dicts by default
+        cache_instance = (await redis_instance_factory()).cache_instance
+        assert not cache_instance.tagged_values
+        await self._check_tagged_reads(cache_instance)
+
+    async def test_tagged_reads_binary_serializer(self, redis_instance_factory):
+        cache_instance = (await redis_instance_factory(serializer=PickleSerializer(), tagged_values=True)).cache_instance
+        tagged_cache = TaggedCacheProxy(cache_instance)
+        await tagged_cache.set('key1', 'value1', tags=['tag1'])
+
+        # tags versions aren't readable by script, they are validated by client
+        with patch.object(cache_instance, 'get_many', wraps=cache_instance.get_many) as get_many:
+            assert await tagged_cache.get('key1') == 'value1'
+            get_many.assert_called_once()
+
+            await tagged_cache.invalidate(['tag1'])
+            assert await tagged_cache.get('key1') is None
+
+    async def test_legacy_tagged_values(self, redis_instance_factory):
+        legacy_instance = (await redis_instance_factory()).cache_instance
+        await TaggedCacheProxy(legacy_instance).set('key1', 'value1', tags=['tag1'])
+        await legacy_instance.client.set('key2', 'value2')
+
+        # values saved by previous versions are readable
+        cache_instance = RedisCacheBackend(legacy_instance.client, tagged_reads=False, tagged_values=True)
+        tagged_cache = TaggedCacheProxy(cache_instance)
+        assert await tagged_cache.get('key1') == 'value1'
+        assert await tagged_cache.get_many(['key1', 'key3']) == {'key1': 'value1', 'key3': None}
+
+        await tagged_cache.set('key2', 'value2', tags=['tag1'])
+        assert (await cache_instance.client.get('key2'))[:1] == TAGGED_VALUE_HEADER
+
+        await tagged_cache.invalidate(['tag1'])
+        assert await tagged_cache.get_many(['key1', 'key2']) == {'key1': None, 'key2': None}
+
+    async def test_tagged_reads_custom_key(self, redis_instance_factory):
+        cache_instance = (await redis_instance_factory(make_key=lambda key: 'custom:' + key)).cache_instance
+        assert not cache_instance.tagged_reads
+
+        tagged_cache = TaggedCacheProxy(cache_instance)
+        await tagged_cache.set('key1', 'value1', tags=['tag1'])
+        assert await tagged_cache.get('key1') == 'value1'
+
+
+SERIALIZER_CLASSES = [
+    JsonSerializer,
+    PickleSerializer,
+    pytest.param(MsgpackSerializer, marks=pytest.mark.skipif(msgpack is None, reason='no msgpack')),
+    MarshalSerializer,
+]
+
+
+@pytest.mark.parametrize('serializer_class', SERIALIZER_CLASSES)
+def test_serializers(serializer_class):
+    serializer = serializer_class()
+    value = {'a': [1, 2.5, None, True], 'b': {'c': 'тест'}}
+
+    data = serializer.dump_value(value)
+    assert isinstance(data, bytes)
+    assert serializer.load_value(data) == value
+
+    # data is readable regardless of default serializer
+    for other in (JsonSerializer(), PickleSerializer(), MarshalSerializer()):
+        assert load_value(data, other) == value
+
+    # bytes-like data is loaded without copying
+    assert serializer.load_value(memoryview(data)) == value
+    assert serializer.load_value(bytearray(data)) == value
+
+
+def test_tagged_value_envelope():
+    tags = {create_tag_cache_key('users_by_states'): get_timestamp(), create_tag_cache_key('тест'): 1}
+    backend = RedisCacheBackend(None, compressor=ZlibCompressor(), compress_threshold=10)
+
+    data = backend.dump_value(TaggedValue(tags, 'value' * 10))
+    assert data[:1] == TAGGED_VALUE_HEADER
+    assert load_tagged_value(data)[0] == tags
+    assert backend.load_value(data) == TaggedValue(tags, 'value' * 10)
+    # only the value is compressed
+    assert backend.stats['compressed'] == 1
+
+    # envelope is more compact than legacy format
+    legacy_data = backend.dump_value({'tags': tags, 'value': 1})
+    assert len(backend.dump_value(TaggedValue(tags, 1))) < len(legacy_data)
+
+
+def test_legacy_serializer():
+    text_module = Mock(dumps=lambda value: str(value), loads=int)
+
+    serializer = LegacySerializer(text_module)
+    assert not serializer.bytes_native
+    assert serializer.dump_value(10) == b'10'
+    assert serializer.load_value(memoryview(b'10')) == 10
+    assert load_value(b'10', serializer) == 10
+
+
+@pytest.mark.skipif(msgpack is None, reason='no msgpack')
+@pytest.mark.parametrize('value', [{'a': 1}, [1], {'a': 1, 'b': 2}, '', list(range(20))])
+def test_legacy_binary_serializer(value):
+    # first bytes of msgpack data are the same as headers of serializers and compressors
+    backend = RedisCacheBackend(None, serializer=msgpack)
+    assert not backend.serializer.detect_headers
+    assert not backend.tagged_reads
+
+    assert backend.load_value(backend.dump_value(value)) == value
+    assert backend.load_value(msgpack.packb(value)) == value
+
+    with pytest.raises(ImproperlyConfigured):
+        backend.dump_value(value, serializer=PickleSerializer())
+    with pytest.raises(ImproperlyConfigured):
+        RedisCacheBackend(None, serializer=msgpack, compressor=ZlibCompressor())
+
+
+@ecached('serialized:{a}', cache_alias='serialized', serializer=PickleSerializer())
+async def serialized_func(a):
+    return cache_mock.trigger_result(a), {a}
+
+
+@ecached('serialized_tagged:{a}', cache_alias='serialized', tags=['serialized_tag:{a}'], serializer=PickleSerializer())
+async def serialized_tagged_func(a):
+    return cache_mock.trigger_result(a), {a}
+
+
+@pytest.mark.asyncio
+class TestRedisSerializers:
+
+    async def test_backend_serializer(self, redis_instance_factory):
+        cache_instance = (await redis_instance_factory(serializer=PickleSerializer())).cache_instance
+        value = {'a': (1, 2), 'b': {3}}
+
+        await cache_instance.set('key1', value)
+        assert await cache_instance.get('key1') == value
+        assert (await cache_instance.client.get('key1'))[:1] == PickleSerializer.header
+
+        # data saved with previous default serializer
+        await cache_instance.client.set('key2', '{"a": 1}')
+        assert await cache_instance.get_many(['key1', 'key2']) == {'key1': value, 'key2': {'a': 1}}
+
+    async def test_function_serializer(self, redis_instance_factory):
+        from easy_cache_async import caches
+
+        cache_instance = (await redis_instance_factory(tagged_values=True)).cache_instance
+        caches['serialized'] = cache_instance
+
+        result = (cache_mock.create_args(1), {1})
+        assert await serialized_func(1) == result
+        assert await serialized_func(1) == result
+        assert (await cache_instance.client.get('serialized:1'))[:1] == PickleSerializer.header
+
+        # tags are saved with backend serializer, so they are validated by lua script
+        assert await serialized_tagged_func(1) == result
+        assert int(await cache_instance.client.get('tag:serialized_tag:1'))
+        assert (await cache_instance.get_tagged('serialized_tagged:1'))[1]
+
+    @pytest.mark.parametrize('compressor', [ZlibCompressor(), LzmaCompressor()])
+    async def test_compression(self, redis_instance_factory, compressor):
+        cache_instance = (await redis_instance_factory(
+            compressor=compressor, compress_threshold=100,
+        )).cache_instance
+        small_value = {'a': 1}
+        large_value = {'a': 'x' * 1000, 'b': list(range(100))}
+
+        await cache_instance.set_many({'small': small_value, 'large': large_value})
+        assert await cache_instance.get_many(['small', 'large']) == {
+            'small': small_value, 'large': large_value,
+        }
+
+        # only large value is compressed
+        assert (await cache_instance.client.get('large'))[:1] == compressor.header
+        assert (await cache_instance.client.get('small'))[:1] == b'{'
+
+        stats = cache_instance.stats
+        assert stats['compressed'] == 1
+        assert stats['decompressed'] == 1
+        assert stats['compress_time'] > 0
+        assert 0 < cache_instance.compression_ratio < 0.5
+
+        # compressed values are readable without compressor too
+        plain_instance = RedisCacheBackend(cache_instance.client)
+        assert await plain_instance.get('large') == large_value
+
+
+@pytest.fixture
+def pool_instance_factory(event_loop, request):
+    async def create(**options):
+        from fakeredis import aioredis as fake_aioredis
+        client = await fake_aioredis.create_redis_pool(maxsize=2)
+
+        def teardown():
+            client.close()
+            event_loop.run_until_complete(client.wait_closed())
+        request.addfinalizer(teardown)
+        return RedisPoolCacheBackend(client, **options)
+    return create
+
+
+@pytest.mark.asyncio
+class TestRedisPoolCacheBackend:
+
+    async def test_operations(self, pool_instance_factory):
+        cache_instance = await pool_instance_factory()
+        assert cache_instance.max_in_flight == 2
+
+        await cache_instance.set('key1', 'value1')
+        await cache_instance.set_many({'key2': 'value2'}, 10)
+        assert await cache_instance.get('key1') == 'value1'
+        assert await cache_instance.get_many(['key1', 'key2']) == {'key1': 'value1', 'key2': 'value2'}
+        assert await cache_instance.delete('key1')
+
+        tagged_cache = TaggedCacheProxy(cache_instance)
+        await tagged_cache.set('key3', 'value3', tags=['tag1'])
+        assert await tagged_cache.get('key3') == 'value3'
+
+        assert cache_instance.pool_stats == {
+            'in_flight': 0, 'max_in_flight': 2, 'pool_size': 1, 'pool_free': 1, 'pool_maxsize': 2,
+        }
+        assert not cache_instance.stats
+
+    async def test_timeouts(self, pool_instance_factory):
+        cache_instance = await pool_instance_factory(operation_timeout=0.01)
+        await cache_instance.set('key1', 'value1')
+
+        async def slow_command(*args, **kwargs):
+            await asyncio.sleep(1)
+
+        # timed out reads are cache misses
+        with patch.object(cache_instance.client, 'get', slow_command), \
+                patch.object(cache_instance.client, 'mget', slow_command), \
+                patch.object(cache_instance.client, 'evalsha', slow_command):
+            assert await cache_instance.get('key1') is NOT_FOUND
+            assert await cache_instance.get_many(['key1', 'key2']) == {'key1': None, 'key2': None}
+            assert await TaggedCacheProxy(cache_instance).get('key1') is None
+
+        # timed out writes are dropped
+        with patch.object(cache_instance.client, 'set', slow_command):
+            assert await cache_instance.set('key1', 'value2') is None
+            # lock isn't waited for
+            assert await cache_instance.acquire_lock('lock', 10) == BYPASS_LOCK_TOKEN
+
+        assert not await cache_instance.release_lock('lock', BYPASS_LOCK_TOKEN)
+        assert await cache_instance.get('key1') == 'value1'
+        assert cache_instance.stats['read_timeouts'] == 3
+        assert cache_instance.stats['write_timeouts'] == 2
+        assert cache_instance.in_flight == 0
+
+    async def test_errors(self, pool_instance_factory):
+        cache_instance = await pool_instance_factory()
+
+        with patch.object(cache_instance.client, 'get', side_effect=ConnectionRefusedError), \
+                patch.object(cache_instance.client, 'pipeline', side_effect=ConnectionRefusedError):
+            assert await cache_instance.get('key1', 'default') == 'default'
+            assert await cache_instance.set_many({'key1': 'value1'}) is None
+
+        assert cache_instance.stats['read_errors'] == 1
+        assert cache_instance.stats['write_errors'] == 1
+
+    async def test_invalidation_errors(self, pool_instance_factory):
+        cache_instance = await pool_instance_factory()
+        tagged_cache = TaggedCacheProxy(cache_instance)
+        await tagged_cache.set('key1', 'value1', tags=['tag1'])
+        delete = cache_instance.client.delete
+
+        # invalidation is retried once
+        with patch.object(cache_instance.client, 'delete', side_effect=[ConnectionRefusedError(), delete('key1')]):
+            assert await cache_instance.delete('key1')
+        assert not cache_instance.stats['invalidate_errors']
+
+        # failed invalidations are raised, so they aren't lost silently
+        with patch.object(cache_instance.client, 'delete', side_effect=ConnectionRefusedError), \
+                patch.object(cache_instance.client, 'pipeline', side_effect=ConnectionRefusedError) as pipeline:
+            with pytest.raises(ConnectionRefusedError):
+                await cache_instance.delete('key1')
+            with pytest.raises(ConnectionRefusedError):
+                await tagged_cache.invalidate(['tag1'])
+            assert pipeline.call_count == 2
+
+        assert cache_instance.stats['invalidate_errors'] == 2
+        assert not cache_instance.stats['write_errors']
+
+    async def test_bounded_concurrency(self, pool_instance_factory):
+        cache_instance = await pool_instance_factory(max_in_flight=1)
+        in_flight = []
+
+        async def get(*args, **kwargs):
+            in_flight.append(cache_instance.in_flight)
+            await asyncio.sleep(0.01)
+
+        with patch.object(cache_instance.client, 'get', get):
+            await asyncio.gather(*[cache_instance.get('key1') for _ in range(3)])
+
+        assert in_flight == [1, 1, 1]
+        assert cache_instance.stats['saturated'] == 2
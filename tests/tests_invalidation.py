@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+from cachetools import Cache
+
+from easy_cache_async.contrib import LocMemCacheBackend, RedisCacheBackend, TieredCacheBackend
+from easy_cache_async.contrib.invalidation import InvalidationBus, LocalTransport, RedisTransport
+from easy_cache_async.core import TaggedCacheProxy
+
+
+@pytest.fixture
+def fake_server():
+    from fakeredis import FakeServer
+    return FakeServer()
+
+
+@pytest.fixture
+def fake_redis_factory(event_loop, request, fake_server):
+    from fakeredis import aioredis as fake_aioredis
+
+    async def create():
+        client = await fake_aioredis.create_redis(server=fake_server)
+
+        def teardown():
+            client.close()
+            event_loop.run_until_complete(client.wait_closed())
+        request.addfinalizer(teardown)
+        return client
+    return create
+
+
+@pytest.mark.asyncio
+class TestInvalidationBus:
+
+    async def test_batching(self):
+        transport = LocalTransport()
+        publisher = InvalidationBus(transport, debounce_ms=10)
+        subscriber = InvalidationBus(transport, debounce_ms=10)
+        received = []
+        publisher.subscribe(received.append)
+        subscriber.subscribe(received.append)
+        await publisher.start()
+        await subscriber.start()
+
+        publisher.publish(['key1', 'key2'])
+        publisher.publish(['key2', 'key3'])
+        await asyncio.sleep(0)
+        assert not received
+
+        # keys are sent with single message, publisher ignores its own messages
+        await asyncio.sleep(0.02)
+        assert received == [['key1', 'key2', 'key3']]
+        assert publisher.stats == {'published': 3, 'sent': 1}
+        assert subscriber.stats == {'received': 3, 'delivered': 1}
+
+    async def test_max_batch_size(self):
+        transport = LocalTransport()
+        publisher = InvalidationBus(transport, debounce_ms=1000, max_batch_size=2)
+        subscriber = InvalidationBus(transport)
+        received = []
+        subscriber.subscribe(received.append)
+        await subscriber.start()
+
+        publisher.publish(['key1'])
+        publisher.publish(['key2'])
+        # sending task is referenced until it's done
+        assert len(publisher._sending) == 1
+        await asyncio.sleep(0.01)
+        assert received == [['key1', 'key2']]
+        assert not publisher._sending
+
+        publisher.publish(['key3'])
+        await publisher.close()
+        await asyncio.sleep(0)
+        assert received == [['key1', 'key2'], ['key3']]
+
+    async def test_redis_transport(self, fake_redis_factory):
+        publisher = InvalidationBus(RedisTransport(await fake_redis_factory()), debounce_ms=0)
+        subscriber = InvalidationBus(RedisTransport(await fake_redis_factory(), await fake_redis_factory()))
+        received = []
+        subscriber.subscribe(received.append)
+        await subscriber.start()
+
+        publisher.publish(['key1'])
+        await asyncio.sleep(0.05)
+        assert received == [['key1']]
+
+        with pytest.raises(ValueError):
+            await publisher.start()
+        await subscriber.close()
+
+
+@pytest.mark.asyncio
+class TestNearCacheInvalidation:
+
+    async def create_process(self, transport, fake_redis_factory):
+        """ Tiered cache of a separate process """
+        bus = InvalidationBus(transport, debounce_ms=1)
+        await bus.start()
+        local = LocMemCacheBackend(Cache(maxsize=100), invalidation_bus=bus)
+        return TieredCacheBackend(local, RedisCacheBackend(await fake_redis_factory()), local_timeout=100)
+
+    async def test_invalidation(self, fake_redis_factory):
+        transport = LocalTransport()
+        cache1 = await self.create_process(transport, fake_redis_factory)
+        cache2 = await self.create_process(transport, fake_redis_factory)
+
+        await cache1.set('key1', 'value1')
+        assert await cache2.get('key1') == 'value1'
+
+        # changed by another process
+        await cache1.set('key1', 'value2')
+        assert await cache2.get('key1') == 'value1'
+        await asyncio.sleep(0.01)
+        assert await cache2.get('key1') == 'value2'
+
+        await cache1.delete('key1')
+        await asyncio.sleep(0.01)
+        assert await cache2.get('key1', None) is None
+
+    async def test_tags_invalidation(self, fake_redis_factory):
+        transport = LocalTransport()
+        tagged_cache1 = TaggedCacheProxy(await self.create_process(transport, fake_redis_factory))
+        tagged_cache2 = TaggedCacheProxy(await self.create_process(transport, fake_redis_factory))
+
+        await tagged_cache1.set('key1', 'value1', tags=['tag1'])
+        assert await tagged_cache2.get('key1') == 'value1'
+
+        await tagged_cache1.invalidate(['tag1'])
+        await asyncio.sleep(0.01)
+        assert await tagged_cache2.get('key1') is None
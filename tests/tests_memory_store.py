@@ -0,0 +1,242 @@
+import asyncio
+from time import monotonic
+from unittest.mock import patch
+
+import pytest
+
+from easy_cache_async.contrib import LocMemCacheBackend
+from easy_cache_async.contrib.locmem_cache import CachedValue
+from easy_cache_async.contrib.memory_store import MemoryStore, get_size_estimator
+from easy_cache_async.contrib.policies import ARCPolicy, CountMinSketch, TinyLFUPolicy
+
+
+def create_value(value, deadline=None):
+    return CachedValue(value, None, deadline)
+
+
+class TestMemoryStore:
+
+    def test_lru(self):
+        store = MemoryStore(maxsize=2)
+        store['key1'] = create_value(1)
+        store['key2'] = create_value(2)
+
+        # key1 is used recently
+        assert store['key1'].value == 1
+        store['key3'] = create_value(3)
+
+        assert list(store) == ['key1', 'key3']
+        assert store.get('key2') is None
+        assert store.stats == {'evicted': 1}
+
+    def test_expire(self):
+        store = MemoryStore(resolution=1, expire_batch_size=2)
+        store['key1'] = create_value(1, 100.5)
+        store['key2'] = create_value(2, 100.7)
+        store['key3'] = create_value(3, 101.5)
+        store['key4'] = create_value(4)
+
+        # bucket isn't passed completely
+        assert store.expire(now=100.9) == 0
+
+        # updated and removed values are removed from index
+        store['key2'] = create_value(2, 200)
+        del store['key3']
+
+        assert store.expire(now=110) == 1
+        assert set(store) == {'key2', 'key4'}
+
+        store.clear()
+        assert store.expire(now=300) == 0
+        assert not store._buckets
+
+    def test_expire_batch_size(self):
+        store = MemoryStore(expire_batch_size=2)
+        for i in range(5):
+            store['key{}'.format(i)] = create_value(i, 100 + i / 10)
+
+        assert store.expire(now=110) == 2
+        assert store.expire(now=110) == 2
+        assert store.expire(now=110) == 1
+        assert len(store) == 0
+        assert store.stats == {'expired': 5}
+
+
+    def test_max_bytes(self):
+        store = MemoryStore(max_bytes=100, size_estimator=len)
+        store['key1'] = 'a' * 40
+        store['key2'] = 'b' * 40
+        assert store.used_bytes == 80
+
+        # least recently used values are evicted until total size fits the budget
+        assert store['key1']
+        store['key3'] = 'c' * 50
+        assert list(store) == ['key1', 'key3']
+        assert store.used_bytes == 90
+
+        store['key3'] = 'c' * 10
+        assert store.used_bytes == 50
+
+        # too large value isn't saved, the previous one is removed
+        store['key1'] = 'a' * 101
+        assert list(store) == ['key3']
+        assert store.used_bytes == 10
+        assert store.stats == {'evicted': 1, 'too_large': 1}
+
+        store.pop('key3')
+        assert store.used_bytes == 0
+
+    def test_size_estimators(self):
+        value = create_value({'key': ['value'] * 10, 'bytes': b'x' * 1000})
+        assert get_size_estimator('deep')(value) > get_size_estimator('serialized')(value) > 1000
+
+        with pytest.raises(ValueError):
+            MemoryStore(size_estimator='unknown')
+
+
+class TestPolicies:
+
+    def replay(self, store, trace):
+        hits = 0
+        for key in trace:
+            if store.get(key) is None:
+                store[key] = create_value(key)
+            else:
+                hits += 1
+        return hits
+
+    @pytest.mark.parametrize('policy', ['tinylfu', 'arc'])
+    def test_scan_resistance(self, policy):
+        hot_keys = ['hot:{}'.format(i) for i in range(50)]
+        scan_keys = ['scan:{}'.format(i) for i in range(500)]
+
+        hits = {}
+        for store_policy in ('lru', policy):
+            store = MemoryStore(maxsize=100, policy=store_policy)
+            self.replay(store, hot_keys * 5)
+
+            self.replay(store, scan_keys)
+            hits[store_policy] = self.replay(store, hot_keys)
+            assert len(store) == 100
+
+        # one-off keys don't flush frequently used ones,
+        # hot keys in the window of W-TinyLFU may be evicted by scan though
+        assert hits['lru'] == 0
+        assert hits[policy] >= len(hot_keys) - 5
+
+    @pytest.mark.parametrize('policy', ['lru', 'tinylfu', 'arc'])
+    def test_new_key_is_kept(self, policy):
+        store = MemoryStore(maxsize=3, policy=policy)
+        for key in ('key1', 'key2', 'key3'):
+            store[key] = create_value(key)
+        for key in ('key1', 'key2', 'key3'):
+            assert store[key]
+
+        # value is readable right after it's saved to the full store
+        store['key4'] = create_value('key4')
+        assert store.get('key4') is not None
+        assert len(store) == 3
+
+    def test_tinylfu(self):
+        policy = TinyLFUPolicy(100)
+        assert (policy.window_capacity, policy.main_capacity, policy.protected_capacity) == (1, 99, 79)
+
+        sketch = CountMinSketch(100, sample_size=1000)
+        for _ in range(20):
+            sketch.increment('key1')
+        sketch.increment('key2')
+        assert sketch.frequency('key1') == 15
+        assert sketch.frequency('key2') >= 1
+
+        # counters are halved periodically
+        sketch.reset()
+        assert sketch.frequency('key1') == 7
+
+    def test_arc(self):
+        store = MemoryStore(maxsize=2, policy='arc')
+        policy = store.policy
+        store['key1'] = create_value(1)
+        store['key2'] = create_value(2)
+        assert store['key1']
+
+        # key seen once is evicted first
+        store['key3'] = create_value(3)
+        assert set(store) == {'key1', 'key3'}
+
+        # hit in ghost list of recently used keys makes their target size larger
+        store['key2'] = create_value(2)
+        assert policy.p == 1
+        assert 'key2' in store
+
+        del store['key2']
+        store.clear()
+        assert not policy._t1 and not policy._t2 and not policy._b1
+
+    def test_policies_options(self):
+        with pytest.raises(ValueError):
+            MemoryStore(policy='unknown')
+        with pytest.raises(ValueError):
+            MemoryStore(policy='arc')
+
+        policy = ARCPolicy(10)
+        assert MemoryStore(policy=policy).policy is policy
+        assert MemoryStore(policy='lru').policy is None
+
+
+@pytest.mark.asyncio
+class TestMemoryStoreBackend:
+
+    async def test_background_expiration(self):
+        store = MemoryStore(resolution=0.01, expire_batch_size=1)
+        cache_instance = LocMemCacheBackend(store)
+
+        await cache_instance.set('key1', 'value1', 0.01)
+        await cache_instance.set_many({'key2': 'value2', 'key3': 'value3'}, 0.01, timeouts={'key3': 0})
+
+        store.start()
+        await asyncio.sleep(0.1)
+        store.stop()
+
+        # expired values are removed without reading
+        assert list(store) == ['key3']
+        assert store.stats == {'expired': 2}
+
+    async def test_lazy_expiration(self):
+        store = MemoryStore()
+        cache_instance = LocMemCacheBackend(store)
+        await cache_instance.set('key1', 'value1', 10)
+
+        with patch('easy_cache_async.contrib.locmem_cache.monotonic', return_value=monotonic() + 20):
+            assert await cache_instance.get('key1', None) is None
+
+        # value is removed from expiry index as well
+        assert 'key1' not in store
+        assert not any(store._buckets.values())
+
+    async def test_max_bytes(self):
+        cache_instance = LocMemCacheBackend(max_bytes=10000)
+        assert cache_instance.used_bytes == 0
+
+        await cache_instance.set_many({'key1': 'a' * 4000, 'key2': 'b' * 4000}, 10)
+        assert 8000 < cache_instance.used_bytes <= 10000
+        await cache_instance.set('key3', 'c' * 4000)
+
+        assert await cache_instance.get_many(['key1', 'key2', 'key3']) == {
+            'key1': None, 'key2': 'b' * 4000, 'key3': 'c' * 4000,
+        }
+        # tracked values expire as well
+        assert cache_instance.client.expire(now=monotonic() + 20) == 1
+        assert cache_instance.used_bytes < 5000
+
+        assert LocMemCacheBackend(MemoryStore()).used_bytes is None
+        with pytest.raises(ValueError):
+            LocMemCacheBackend(MemoryStore(), max_bytes=100)
+        with pytest.raises(ValueError):
+            LocMemCacheBackend(MemoryStore(), policy='arc')
+
+    async def test_policy(self):
+        cache_instance = LocMemCacheBackend(maxsize=10, policy='tinylfu')
+        assert isinstance(cache_instance.client.policy, TinyLFUPolicy)
+
+        await cache_instance.set_many({'key{}'.format(i): i for i in range(20)})
+        assert len(cache_instance.client) == 10
@@ -1,7 +1,26 @@
+import inspect
+
+import pytest
+
+from easy_cache_async.core import BoundCached, BoundTaggedCached
+from easy_cache_async.utils import ArgumentsBinder, CompiledTemplate
+
 from .tests_basic import ordinal_func, __name__ as __basic_name__
 from .fixtures import User, __name__ as __test_name__
 
 
+def func_simple(a, b, c=1, d='d'):
+    pass
+
+
+def func_varargs(a, *args, b=2, **kwargs):
+    pass
+
+
+def func_kwargs(**kwargs):
+    pass
+
+
 class TestMiscellaneous:
 
     def test_class_repr(self):
@@ -44,3 +63,87 @@ class TestMiscellaneous:
             'cache_key="{kwargs[a]}:{kwargs[b]}", tags="()", '
             'prefix="пользователь", timeout=DEFAULT_TIMEOUT>'
         )
+
+    def test_bound_cached(self):
+        user = User(1, None)
+        bound = user.instance_default_cache_key
+        unbound = User.__dict__['instance_default_cache_key']
+
+        assert isinstance(bound, BoundCached)
+        assert bound.cached is unbound
+        assert bound.instance is user and bound.scope is user
+        # state is shared with unbound object
+        assert bound.stats is unbound.stats
+        assert bound.timeout is unbound.timeout
+        assert bound.__name__ == 'instance_default_cache_key'
+        assert repr(bound) == (
+            '<Cached: '
+            'callable="' + __test_name__ + '.User.instance_default_cache_key", '
+            'cache_key="easy_cache_async.core.Cached.create_cache_key", timeout=DEFAULT_TIMEOUT>'
+        )
+
+        assert isinstance(user.instance_method_tags, BoundTaggedCached)
+        assert user.instance_method_tags.invalidate_cache_by_tags
+
+    @pytest.mark.parametrize('function, args, kwargs', [
+        (func_simple, (1, 2), {}),
+        (func_simple, (1, 2, 3), {'d': 4}),
+        (func_simple, (1,), {'b': 2}),
+        (func_simple, (), {'a': 1, 'b': 2, 'c': 3}),
+        (func_varargs, (1, 2, 3), {'b': 4, 'e': 5}),
+        (func_varargs, (1,), {}),
+        (func_kwargs, (), {'a': 1}),
+        (func_kwargs, (), {}),
+    ])
+    def test_arguments_binder(self, function, args, kwargs):
+        binder = ArgumentsBinder(function)
+        assert binder.bind(args, kwargs) == inspect.getcallargs(function, *args, **kwargs)
+
+    @pytest.mark.parametrize('function, args, kwargs', [
+        (func_simple, (1,), {}),
+        (func_simple, (1, 2, 3, 4, 5), {}),
+        (func_simple, (1, 2), {'a': 1}),
+        (func_simple, (1, 2), {'e': 1}),
+        (func_kwargs, (1, ), {}),
+    ])
+    def test_arguments_binder_errors(self, function, args, kwargs):
+        binder = ArgumentsBinder(function)
+
+        with pytest.raises(TypeError):
+            inspect.getcallargs(function, *args, **kwargs)
+
+        with pytest.raises(TypeError):
+            binder.bind(args, kwargs)
+
+    @pytest.mark.parametrize('template', [
+        'key:{a}:{b}',
+        '{a!r}-{b!s:>5}',
+        '{a.real}:{b[0]}:{{escaped}}',
+        '{c:.2f}',
+        '{d[key].real}:{d[1][0]}:{e.__class__.__name__}',
+        '',
+    ])
+    def test_compiled_template(self, template):
+        call_args = {'a': 1, 'b': 'bbb', 'c': 3.14159, 'd': {'key': 2, 1: 'x'}, 'e': 1.0}
+        compiled = CompiledTemplate.compile(template)
+        assert compiled.format(call_args) == template.format(**call_args)
+
+    @pytest.mark.parametrize('template', ['{}', '{0}', '{0.real}', '{a:{b}}', '{a', '{a.}', '{a[]}', '{a[0]b}'])
+    def test_compiled_template_unsupported(self, template):
+        assert CompiledTemplate.compile(template) is None
+
+    @pytest.mark.parametrize('args, kwargs, is_simple', [
+        ((1, 2), {}, True),
+        ((1,), {'b': 2, 'd': 4}, True),
+        ((1, 2, 3, 4, 5), {}, False),
+        ((1, 2), {'a': 1}, False),
+        ((1, 2), {'e': 1}, False),
+    ])
+    def test_compiled_template_arguments(self, args, kwargs, is_simple):
+        binder = ArgumentsBinder(func_simple)
+        compiled = CompiledTemplate.compile('{a}:{b}:{c}:{d}')
+
+        assert binder.is_simple_call(args, kwargs) is is_simple
+        if is_simple:
+            assert compiled.format_arguments(binder, args, kwargs) == \
+                compiled.format(binder.bind(args, kwargs))
@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from easy_cache_async import caches, ecached
+from easy_cache_async.contrib.shared_memory import (
+    SEQUENCE,
+    SharedMemoryCacheBackend,
+    SharedMemoryTable,
+)
+
+from .tools import CacheMock
+
+
+cache_mock = CacheMock()
+SHARED_CACHE_ALIAS = 'shared-memory'
+
+
+@ecached('shared_locked:{a}', cache_alias=SHARED_CACHE_ALIAS, lock_timeout=10)
+async def shared_locked_func(a):
+    return cache_mock.trigger_result(a)
+
+
+@pytest.fixture
+def table_path():
+    fd, path = tempfile.mkstemp(prefix='easy-cache-async-')
+    os.close(fd)
+    yield path
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def write_value(path, key, value):
+    table = SharedMemoryTable(path, buckets=4, ways=2, slot_size=256)
+    table.set(key, value)
+    table.close()
+
+
+class TestSharedMemoryTable:
+
+    def test_processes(self, table_path):
+        table = SharedMemoryTable(table_path, buckets=4, ways=2, slot_size=256)
+
+        process = multiprocessing.get_context('fork').Process(
+            target=write_value, args=(table_path, b'key1', b'value1')
+        )
+        process.start()
+        process.join()
+
+        # value written by another process is visible without any requests
+        assert process.exitcode == 0
+        assert table.get(b'key1') == b'value1'
+
+        with pytest.raises(ValueError):
+            SharedMemoryTable(table_path, buckets=8, ways=2, slot_size=256)
+        table.close()
+
+    def test_bucket_replacement(self, table_path):
+        table = SharedMemoryTable(table_path, buckets=1, ways=2, slot_size=256)
+        now = 1000.0
+
+        for i, key in enumerate([b'key1', b'key2', b'key1', b'key3']):
+            with patch('easy_cache_async.contrib.shared_memory.time', return_value=now + i):
+                assert table.set(key, b'value')
+
+        # the least recently written key is replaced
+        assert sorted(key for key, _ in table.items()) == [b'key1', b'key3']
+
+        # expired key is replaced first
+        table.set(b'key1', b'value', deadline=now - 1)
+        assert table.get(b'key1') is None
+        table.set(b'key4', b'value')
+        assert sorted(key for key, _ in table.items()) == [b'key3', b'key4']
+
+        assert table.delete(b'key3')
+        assert not table.delete(b'key3')
+        table.clear()
+        assert table.items() == []
+
+    def test_large_values(self, table_path):
+        table = SharedMemoryTable(table_path, buckets=1, ways=2, slot_size=128)
+        assert table.set(b'key1', b'value1')
+
+        # value is deleted if the new one doesn't fit slot
+        assert not table.set(b'key1', b'x' * 128)
+        assert table.get(b'key1') is None
+
+    def test_sequence_lock(self, table_path):
+        table = SharedMemoryTable(table_path, buckets=1, ways=1, slot_size=128, read_retries=3)
+        table.set(b'key1', b'value1')
+
+        # slot is being written by another process
+        sequence = SEQUENCE.unpack_from(table.mmap, 64)[0]
+        SEQUENCE.pack_into(table.mmap, 64, sequence + 1)
+        assert table.get(b'key1') is None
+
+        SEQUENCE.pack_into(table.mmap, 64, sequence + 2)
+        assert table.get(b'key1') == b'value1'
+
+
+@pytest.mark.asyncio
+class TestSharedMemoryCacheBackend:
+
+    # noinspection PyAttributeOutsideInit
+    @pytest.fixture(autouse=True)
+    def setup(self, table_path):
+        cache_mock.reset_mock()
+        self.backend = SharedMemoryCacheBackend(SharedMemoryTable(table_path, buckets=16, slot_size=256))
+        caches[SHARED_CACHE_ALIAS] = self.backend
+        yield
+        self.backend.client.close()
+
+    async def test_too_large(self):
+        await self.backend.set_many({'key1': 'value1', 'key2': 'x' * 256})
+
+        assert await self.backend.get_many(['key1', 'key2']) == {'key1': 'value1', 'key2': None}
+        assert self.backend.stats['too_large'] == 1
+
+    async def test_locks(self):
+        token = await self.backend.acquire_lock('lock', 10)
+        assert token
+        assert await self.backend.acquire_lock('lock', 10) is None
+
+        assert not await self.backend.release_lock('lock', 'another-token')
+        assert await self.backend.release_lock('lock', token)
+
+        # expired lock is acquired again
+        assert await self.backend.acquire_lock('lock', -1)
+        assert await self.backend.acquire_lock('lock', 10)
+
+        assert await shared_locked_func(1) == cache_mock.create_args(1)
+        assert await shared_locked_func(1) == cache_mock.create_args(1)
+        cache_mock.assert_called_once_with('1')
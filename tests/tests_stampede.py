@@ -0,0 +1,282 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from easy_cache_async import caches, create_lock_cache_key, ecached
+from easy_cache_async.core import get_timestamp, should_recompute_early
+
+from .conftest import create_fake_redis
+from .tools import BaseTest, CacheMock
+
+
+cache_mock = CacheMock()
+LOCK_CACHE_ALIAS = 'stampede-lock'
+
+
+@ecached('coalesced:{a}', coalesce=True)
+async def coalesced_func(a):
+    await asyncio.sleep(0.01)
+    return cache_mock.trigger_result(a)
+
+
+@ecached('coalesced_tagged:{a}', tags=['coalesced'], coalesce=True)
+async def coalesced_tagged_func(a):
+    await asyncio.sleep(0.01)
+    return cache_mock.trigger_result(a)
+
+
+@ecached('coalesced_error:{a}', coalesce=True)
+async def coalesced_error_func(a):
+    await asyncio.sleep(0.01)
+    cache_mock.trigger_result(a)
+    raise ValueError(a)
+
+
+@ecached('stale:{a}', 10, stale_ttl=100)
+async def stale_func(a):
+    return cache_mock.trigger_result(a, stale_func.stats['stale'])
+
+
+@ecached('stale_tagged:{a}', 10, tags=['stale'], stale_ttl=100)
+async def stale_tagged_func(a):
+    return cache_mock.trigger_result(a, stale_tagged_func.stats['stale'])
+
+
+@ecached('early:{a}', 100, early_recompute_beta=1.0)
+async def early_recompute_func(a):
+    await asyncio.sleep(0.01)
+    return cache_mock.trigger_result(a, early_recompute_func.stats['early_recomputes'])
+
+
+@pytest.mark.usefixtures('setup')
+@pytest.mark.asyncio
+class TestCoalesce(BaseTest):
+
+    @staticmethod
+    def get_cache_mock() -> CacheMock:
+        return cache_mock
+
+    async def _check_coalesced(self, cache_callable, a):
+        cache_callable.stats.clear()
+        result = self.cache_mock.create_args(a)
+
+        results = await asyncio.gather(*[cache_callable(a) for _ in range(10)])
+
+        assert results == [result] * 10
+        self.cache_mock.assert_called_once_with(result)
+        assert cache_callable.stats['coalesced'] == 9
+        self.cache_mock.reset_mock()
+
+        # cached version
+        assert await cache_callable(a) == result
+        self.cache_mock.assert_not_called()
+        assert not cache_callable._in_flight
+
+    async def test_coalesce(self):
+        await self._check_coalesced(coalesced_func, 1)
+
+    async def test_coalesce_tagged(self):
+        await self._check_coalesced(coalesced_tagged_func, 2)
+
+    async def test_coalesce_exception(self):
+        results = await asyncio.gather(
+            *[coalesced_error_func(3) for _ in range(5)],
+            return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        self.cache_mock.assert_called_once_with('3')
+        assert not coalesced_error_func._in_flight
+
+    async def test_coalesce_cancelled(self):
+        result = self.cache_mock.create_args(4)
+        first = asyncio.ensure_future(coalesced_func(4))
+        await asyncio.sleep(0)
+        others = [asyncio.ensure_future(coalesced_func(4)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        # the first caller is gone, but the shared calculation isn't cancelled
+        first.cancel()
+        assert await asyncio.gather(*others) == [result] * 3
+        assert first.cancelled()
+        self.cache_mock.assert_called_once_with(result)
+        assert await coalesced_func(4) == result
+
+
+@pytest.mark.usefixtures('setup')
+@pytest.mark.asyncio
+class TestStaleWhileRevalidate(BaseTest):
+
+    @staticmethod
+    def get_cache_mock() -> CacheMock:
+        return cache_mock
+
+    async def _check_stale(self, cache_callable, cache_key):
+        cache_callable.stats.clear()
+        result = self.cache_mock.create_args(1, 0)
+
+        assert await cache_callable(1) == result
+        self.cache_mock.assert_called_once_with(result)
+        self.cache_mock.reset_mock()
+
+        # hard timeout includes stale period
+        await self._check_timeout(cache_key, 10 + 100)
+
+        # fresh value
+        assert await cache_callable(1) == result
+        self.cache_mock.assert_not_called()
+
+        # soft expiration reached, stale value is returned immediately
+        with patch('easy_cache_async.core.get_timestamp',
+                   return_value=get_timestamp() + 11 * 1000000):
+            assert await asyncio.gather(cache_callable(1), cache_callable(1)) == [result] * 2
+
+        # refreshed only once in background
+        new_result = self.cache_mock.create_args(1, 2)
+        await asyncio.sleep(0.01)
+        self.cache_mock.assert_called_once_with(new_result)
+        assert not cache_callable._refreshing
+        self.cache_mock.reset_mock()
+
+        assert await cache_callable(1) == new_result
+        self.cache_mock.assert_not_called()
+
+    async def test_stale(self):
+        await self._check_stale(stale_func, 'stale:1')
+
+    async def test_stale_tagged(self):
+        await self._check_stale(stale_tagged_func, 'stale_tagged:1')
+
+    async def test_stale_ttl_removed(self):
+        stale_func.stats.clear()
+        result = self.cache_mock.create_args(2, 0)
+        assert await stale_func(2) == result
+
+        # value saved with envelope is unwrapped after the option is removed
+        with patch.object(stale_func, 'stale_ttl', None):
+            assert await stale_func(2) == result
+        self.cache_mock.assert_called_once_with(result)
+
+    async def test_envelope_like_value(self):
+        value = {'value': 1, 'expires_at': 1, 'delta': 1}
+
+        @ecached('envelope_like', 10, stale_ttl=100)
+        async def envelope_like_func():
+            self.cache_mock()
+            return value
+
+        assert await envelope_like_func() == value
+        assert await envelope_like_func() == value
+        self.cache_mock.assert_called_once_with()
+
+
+def test_should_recompute_early():
+    now = get_timestamp()
+    delta = 10000
+
+    with patch('easy_cache_async.core.random', return_value=0.5):
+        # -log(0.5) * delta ~ 6931 microseconds before expiration
+        assert not should_recompute_early(now, now + 7000, delta, 1.0)
+        assert should_recompute_early(now, now + 6000, delta, 1.0)
+        # bigger beta, earlier recomputation
+        assert should_recompute_early(now, now + 7000, delta, 2.0)
+
+
+@pytest.mark.usefixtures('setup')
+@pytest.mark.asyncio
+class TestEarlyRecompute(BaseTest):
+
+    @staticmethod
+    def get_cache_mock() -> CacheMock:
+        return cache_mock
+
+    async def test_early_recompute(self):
+        cache_callable = early_recompute_func
+        cache_callable.stats.clear()
+        result = self.cache_mock.create_args(1, 0)
+
+        assert await cache_callable(1) == result
+        self.cache_mock.assert_called_once_with(result)
+        self.cache_mock.reset_mock()
+
+        # envelope doesn't change backend timeout
+        await self._check_timeout('early:1', 100)
+
+        # far from expiration
+        assert await cache_callable(1) == result
+        self.cache_mock.assert_not_called()
+        assert cache_callable.stats['early_recomputes'] == 0
+
+        # close to expiration, value is recomputed in background
+        with patch('easy_cache_async.core.get_timestamp',
+                   return_value=get_timestamp() + 100 * 1000000 - 20000), \
+                patch('easy_cache_async.core.random', return_value=0.999):
+            assert await cache_callable(1) == result
+
+        assert cache_callable.stats['stale'] == 0
+
+        await asyncio.sleep(0.05)
+        new_result = self.cache_mock.create_args(1, 1)
+        self.cache_mock.assert_called_once_with(new_result)
+        self.cache_mock.reset_mock()
+
+        assert await cache_callable(1) == new_result
+        self.cache_mock.assert_not_called()
+
+
+@ecached('locked:{a}', cache_alias=LOCK_CACHE_ALIAS, lock_timeout=1)
+async def locked_func(a):
+    await asyncio.sleep(0.05)
+    return cache_mock.trigger_result(a)
+
+
+@ecached('locked_timeout:{a}', cache_alias=LOCK_CACHE_ALIAS, lock_timeout=0.1)
+async def locked_timeout_func(a):
+    return cache_mock.trigger_result(a)
+
+
+@pytest.mark.asyncio
+class TestDistributedLock:
+
+    # noinspection PyAttributeOutsideInit
+    @pytest.fixture(autouse=True)
+    def setup(self, event_loop, request):
+        self.cache_mock = cache_mock
+        self.cache_mock.reset_mock()
+        self.local_cache = event_loop.run_until_complete(create_fake_redis(event_loop, request))
+        caches[LOCK_CACHE_ALIAS] = self.local_cache.cache_instance
+
+    async def test_lock(self):
+        locked_func.stats.clear()
+        result = self.cache_mock.create_args(1)
+
+        # no coalescing, every call misses the cache
+        results = await asyncio.gather(*[locked_func(1) for _ in range(5)])
+
+        assert results == [result] * 5
+        self.cache_mock.assert_called_once_with(result)
+        assert locked_func.stats['lock_waits'] == 4
+        assert locked_func.stats['lock_timeouts'] == 0
+
+        # lock is released
+        assert not await self.local_cache.contains(create_lock_cache_key('locked', 1))
+
+    async def test_lock_timeout(self):
+        locked_timeout_func.stats.clear()
+        lock_key = create_lock_cache_key('locked_timeout', 2)
+
+        # lock is acquired by someone else
+        token = await self.local_cache.acquire_lock(lock_key, 10)
+        assert token
+        assert await self.local_cache.acquire_lock(lock_key, 10) is None
+
+        result = self.cache_mock.create_args(2)
+        assert await locked_timeout_func(2) == result
+        self.cache_mock.assert_called_once_with(result)
+        assert locked_timeout_func.stats['lock_timeouts'] == 1
+
+        # foreign lock is not released
+        assert not await self.local_cache.release_lock(lock_key, 'wrong-token')
+        assert await self.local_cache.release_lock(lock_key, token)
+        assert not await self.local_cache.contains(lock_key)
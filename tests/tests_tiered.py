@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+import pytest
+from cachetools import Cache
+
+from easy_cache_async import caches, ecached
+from easy_cache_async.contrib import LocMemCacheBackend
+from easy_cache_async.contrib.tiered import TieredCacheBackend
+from easy_cache_async.core import NOT_FOUND
+
+from .conftest import create_fake_redis
+from .tools import CacheMock
+
+
+cache_mock = CacheMock()
+TIERED_CACHE_ALIAS = 'tiered'
+
+
+@ecached('tiered:{a}', 100, tags=['tiered:{a}'], cache_alias=TIERED_CACHE_ALIAS)
+async def tiered_func(a):
+    return cache_mock.trigger_result(a)
+
+
+@pytest.mark.asyncio
+class TestTieredCacheBackend:
+
+    # noinspection PyAttributeOutsideInit
+    @pytest.fixture(autouse=True)
+    def setup(self, event_loop, request):
+        self.cache_mock = cache_mock
+        self.cache_mock.reset_mock()
+
+        self.remote = event_loop.run_until_complete(create_fake_redis(event_loop, request)).cache_instance
+        self.local = LocMemCacheBackend(Cache(maxsize=100))
+        self.cache_instance = TieredCacheBackend(self.local, self.remote, local_timeout=10)
+        caches[TIERED_CACHE_ALIAS] = self.cache_instance
+
+    def patch_remote(self, method):
+        return patch.object(self.remote, method, wraps=getattr(self.remote, method))
+
+    async def test_get(self):
+        await self.remote.set('key1', 'value1')
+
+        with self.patch_remote('get') as get:
+            assert await self.cache_instance.get('key1') == 'value1'
+            assert await self.cache_instance.get('key1') == 'value1'
+            assert await self.cache_instance.get('key2') is NOT_FOUND
+            assert get.call_count == 2
+
+        assert self.local.client['key1'].timeout == 10
+        assert self.cache_instance.stats == {'local_hits': 1, 'remote_hits': 1, 'misses': 1}
+
+    async def test_get_many(self):
+        await self.local.set('key1', 'value1')
+        await self.remote.set_many({'key2': 'value2', 'key3': 'value3'})
+
+        with self.patch_remote('get_many') as get_many:
+            assert await self.cache_instance.get_many(['key1', 'key2', 'key4']) == {
+                'key1': 'value1', 'key2': 'value2', 'key4': None,
+            }
+            get_many.assert_called_once_with(['key2', 'key4'], NOT_FOUND)
+
+            # remote values are saved locally
+            assert await self.cache_instance.get_many(['key1', 'key2']) == {'key1': 'value1', 'key2': 'value2'}
+            get_many.assert_called_once()
+
+    async def test_set(self):
+        await self.cache_instance.set('key1', 'value1', 100)
+        await self.cache_instance.set_many({'key2': 'value2', 'key3': 'value3'}, 5, timeouts={'key3': 200})
+
+        assert await self.remote.get_many(['key1', 'key2', 'key3']) == {
+            'key1': 'value1', 'key2': 'value2', 'key3': 'value3',
+        }
+        assert await self.remote.client.ttl('key3') == 200
+
+        # local timeout is never longer than `local_timeout`
+        assert [self.local.client[key].timeout for key in ('key1', 'key2', 'key3')] == [10, 5, 10]
+
+        assert await self.cache_instance.delete('key1')
+        assert await self.local.get('key1') is NOT_FOUND
+        assert await self.remote.get('key1') is NOT_FOUND
+
+    async def test_tags(self):
+        result = self.cache_mock.create_args(1)
+        assert await tiered_func(1) == result
+
+        # tags versions are read from local cache too
+        with self.patch_remote('get') as get, self.patch_remote('get_many') as get_many:
+            assert await tiered_func(1) == result
+            get.assert_not_called()
+            get_many.assert_not_called()
+
+        # invalidation made by the same process is visible immediately
+        await tiered_func.invalidate_cache_by_tags(a=1)
+        assert await tiered_func(1) == result
+        assert self.cache_mock.call_count == 2
+
+    async def test_locks(self):
+        assert self.cache_instance.acquire_lock == self.remote.acquire_lock
+        assert not hasattr(TieredCacheBackend(self.local, self.local), 'acquire_lock')